@@ -0,0 +1,80 @@
+"""Benchmarks batch_assignment_utilities against one linear_sum_assignment call per claim.
+
+The pairwise matrices are built from the dev gold file: every gold claim is matched against the
+evidence of another claim plus a random subset of its own questions, so the matrix shapes follow
+the real dev set. Run from the repository root:
+
+    python benchmarks/bench_assignment.py [--metric meteor] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import evaluation_script.assignment as assignment
+from evaluation_script.main import AVeriTeCEvaluator, compute_all_pairwise_scores, pairwise_meteor
+
+
+def token_overlap(candidate, reference):
+    candidate, reference = set(candidate.lower().split()), set(reference.lower().split())
+    return len(candidate & reference) / float(max(len(candidate | reference), 1))
+
+
+def build_matrices(gold_file, metric, seed=0):
+    with open(gold_file) as f:
+        references = json.load(f)
+    rng = random.Random(seed)
+    scorer = AVeriTeCEvaluator()
+
+    matrices = []
+    for tgt in references:
+        other = rng.choice(references)
+        evidence = [{"question": qa["question"], "answer": qa["answers"][0]["answer"] if qa["answers"] else ""}
+                    for qa in other["questions"] + rng.sample(tgt["questions"], rng.randint(0, len(tgt["questions"])))]
+        src = {"evidence": evidence}
+        src_strings = scorer.extract_full_comparison_strings(src, is_target=False)[: scorer.max_questions]
+        tgt_strings = scorer.extract_full_comparison_strings(tgt)
+        matrices.append(compute_all_pairwise_scores(src_strings, tgt_strings, metric))
+        matrices.append(compute_all_pairwise_scores([qa["question"] for qa in evidence[: scorer.max_questions]],
+                                                    [qa["question"] for qa in tgt["questions"]], metric))
+    return matrices
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gold", default="annotations/averitec_dev_gold.json")
+    parser.add_argument("--metric", choices=["overlap", "meteor"], default="overlap")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    metric = pairwise_meteor if args.metric == "meteor" else token_overlap
+    matrices = build_matrices(args.gold, metric)
+    shapes = {}
+    for matrix in matrices:
+        shapes[matrix.shape] = shapes.get(matrix.shape, 0) + 1
+    print("{} matrices, {} distinct shapes".format(len(matrices), len(shapes)))
+
+    timings = {"per-claim solver": [], "batched": []}
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        expected = [assignment.solver_utility(matrix) for matrix in matrices]
+        timings["per-claim solver"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        utilities = assignment.batch_assignment_utilities(matrices)
+        timings["batched"].append(time.perf_counter() - start)
+
+    mismatches = sum(np.float64(a).tobytes() != np.float64(b).tobytes() for a, b in zip(expected, utilities))
+    for name, values in timings.items():
+        print("{:>18}: best {:.2f} ms".format(name, 1000 * min(values)))
+    print("bit-identical: {} ({} mismatches)".format(mismatches == 0, mismatches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Step throughput of the code-upload environment protocol: typed protobuf messages vs pickle.
+
+The pickle path is the former protocol (a pickled {"feedback", "current_score"} dict in a bytes
+field), served here through a raw-bytes method. Both run against the same CartPole-shaped step
+function so only serialization and transport are measured. Run from the repository root:
+
+    python benchmarks/bench_code_upload_serialization.py [--steps 5000] [--observation-size 4]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+from concurrent import futures
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "code_upload_challenge_evaluation", "utils"))
+
+import grpc
+import numpy as np
+
+import evaluation_pb2
+import evaluation_pb2_grpc
+from serialization import pack_action, pack_feedback, unpack_action, unpack_feedback
+
+
+class CartPoleShapedSteps:
+    def __init__(self, observation_size):
+        self.observation = np.random.RandomState(0).randn(observation_size)
+        self.score = 0
+
+    def step(self, action):
+        self.score += 1
+        return self.observation, 1.0, False, {}
+
+
+class TypedEnvironment(evaluation_pb2_grpc.EnvironmentServicer):
+    def __init__(self, steps):
+        self.steps = steps
+
+    def act_on_environment(self, request, context):
+        feedback = self.steps.step(unpack_action(request))
+        return pack_feedback(feedback, self.steps.score)
+
+
+def pickle_handler(steps):
+    def act(request, context):
+        feedback = steps.step(pickle.loads(request))
+        return pickle.dumps({"feedback": feedback, "current_score": steps.score})
+
+    return grpc.method_handlers_generic_handler("pickle.Environment", {
+        "act_on_environment": grpc.unary_unary_rpc_method_handler(act),
+    })
+
+
+def time_loop(step, n_steps):
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        step()
+    return n_steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--observation-size", type=int, default=4)
+    args = parser.parse_args()
+
+    steps = CartPoleShapedSteps(args.observation_size)
+    feedback = steps.step(1)
+
+    print("serialization only (steps/s):")
+    print("  pickle:   {:.0f}".format(time_loop(
+        lambda: pickle.loads(pickle.dumps({"feedback": feedback, "current_score": 1})), args.steps)))
+    print("  protobuf: {:.0f}".format(time_loop(
+        lambda: unpack_feedback(evaluation_pb2.Feedback.FromString(
+            pack_feedback(feedback, 1).SerializeToString())), args.steps)))
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    evaluation_pb2_grpc.add_EnvironmentServicer_to_server(TypedEnvironment(steps), server)
+    server.add_generic_rpc_handlers((pickle_handler(steps),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    channel = grpc.insecure_channel("127.0.0.1:{}".format(port))
+    stub = evaluation_pb2_grpc.EnvironmentStub(channel)
+    pickle_step = channel.unary_unary("/pickle.Environment/act_on_environment")
+
+    print("unary gRPC step on localhost (steps/s):")
+    print("  pickle:   {:.0f}".format(time_loop(
+        lambda: pickle.loads(pickle_step(pickle.dumps(1))), args.steps)))
+    print("  protobuf: {:.0f}".format(time_loop(
+        lambda: unpack_feedback(stub.act_on_environment(pack_action(1))), args.steps)))
+    server.stop(0)
+
+
+if __name__ == "__main__":
+    main()
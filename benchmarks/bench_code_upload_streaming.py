@@ -0,0 +1,90 @@
+"""Step throughput of the code-upload environment: unary act_on_environment vs stream_steps.
+
+Uses the CartPole-shaped step function of bench_code_upload_serialization.py, so only the
+transport is measured. Run from the repository root:
+
+    python benchmarks/bench_code_upload_streaming.py [--steps 20000] [--batch-sizes 1 8 32]
+"""
+import argparse
+import queue
+import time
+from concurrent import futures
+
+import grpc
+
+# Also puts code_upload_challenge_evaluation/utils on sys.path
+from bench_code_upload_serialization import CartPoleShapedSteps
+
+import evaluation_pb2_grpc
+from serialization import pack_action, pack_feedback, pack_step_batch, serve_step_batches, unpack_action, \
+    unpack_feedback
+
+
+class StreamingEnvironment(evaluation_pb2_grpc.EnvironmentServicer):
+    def __init__(self, steps):
+        self.steps = steps
+
+    def step(self, env_index, action, message=None):
+        return pack_feedback(self.steps.step(action), self.steps.score, message, env_index)
+
+    def act_on_environment(self, request, context):
+        return self.step(0, unpack_action(request))
+
+    def stream_steps(self, request_iterator, context):
+        return serve_step_batches(request_iterator, self.step)
+
+
+def run_unary(stub, n_steps):
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        unpack_feedback(stub.act_on_environment(pack_action(1)))
+    return n_steps / (time.perf_counter() - start)
+
+
+def run_stream(stub, n_steps, batch_size):
+    """Closed loop, as an agent runs: the next batch is sent once the previous feedback arrived."""
+    actions = queue.Queue()
+
+    def action_stream():
+        while True:
+            batch = actions.get()
+            if batch is None:
+                return
+            yield batch
+
+    start = time.perf_counter()
+    sent = batch_size
+    actions.put(pack_step_batch([1] * batch_size))
+    for response in stub.stream_steps(action_stream()):
+        for message in response.feedback:
+            unpack_feedback(message)
+        if sent >= n_steps:
+            actions.put(None)
+            break
+        sent += batch_size
+        actions.put(pack_step_batch([1] * batch_size))
+    return sent / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    evaluation_pb2_grpc.add_EnvironmentServicer_to_server(StreamingEnvironment(CartPoleShapedSteps(4)), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    stub = evaluation_pb2_grpc.EnvironmentStub(grpc.insecure_channel("127.0.0.1:{}".format(port)))
+
+    print("steps/s on localhost:")
+    print("  unary act_on_environment: {:.0f}".format(run_unary(stub, args.steps)))
+    for batch_size in args.batch_sizes:
+        print("  stream_steps, {:>3} action(s) per message: {:.0f}".format(
+            batch_size, run_stream(stub, args.steps, batch_size)))
+    server.stop(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""End-to-end benchmark of evaluate() on synthetic AVeriTeC-shaped data, per evaluation stage.
+
+Gold files and submissions follow the schema of annotations/averitec_dev_gold.json and of a
+submission (claim_id, claim, pred_label, evidence), with tunable question counts and answer
+lengths. EV2R requests go to a fake LLM that sleeps `--latency` seconds and returns a
+well-formed response, so the timings measure this repository rather than the Gemini API.
+Run from the repository root:
+
+    python benchmarks/bench_evaluation.py [--sizes 500 5000 50000] [--latency 0.0] \\
+        [--save results.json] [--compare baseline.json]
+
+--save stores the timings as json; --compare prints them next to an earlier --save of the same
+sizes and exits with status 1 when a stage got slower than --tolerance allows.
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import evaluation_script.main as main
+
+WORDS = ("the government said that a new report shows more people were paid by state officials in the "
+         "election year while video posted online claims local hospitals closed after the vaccine law "
+         "was passed and prices of food rose since records began according to official data").split()
+ANSWER_TYPES = ["Extractive", "Abstractive", "Boolean", "Unanswerable"]
+ANSWER_TYPE_WEIGHTS = [0.5, 0.26, 0.21, 0.03]
+
+
+def sentence(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize()
+
+
+def make_answer(rng, answer_words):
+    answer_type = rng.choices(ANSWER_TYPES, ANSWER_TYPE_WEIGHTS)[0]
+    url = "https://web.archive.org/web/2021/https://example.org/{}".format(rng.getrandbits(32))
+    answer = {"answer_type": answer_type, "source_url": url, "source_medium": "Web text",
+              "cached_source_url": url}
+    if answer_type == "Boolean":
+        answer["answer"] = rng.choice(["Yes", "No"])
+        answer["boolean_explanation"] = sentence(rng, rng.randint(*answer_words))
+    elif answer_type == "Unanswerable":
+        answer["answer"] = "No answer could be found."
+    else:
+        answer["answer"] = sentence(rng, rng.randint(*answer_words))
+    return answer
+
+
+def make_gold(n_claims, rng, questions, answer_words):
+    labels = list(main.EV2REvaluator.verdicts)
+    gold = []
+    for _ in range(n_claims):
+        gold.append({
+            "claim": sentence(rng, rng.randint(8, 30)) + ".",
+            "required_reannotation": False,
+            "label": rng.choices(labels, [0.24, 0.61, 0.07, 0.08])[0],
+            "justification": sentence(rng, rng.randint(10, 40)) + ".",
+            "claim_date": "31-10-2020",
+            "speaker": None,
+            "original_claim_url": None,
+            "fact_checking_article": "https://example.org/fact-check/{}".format(rng.getrandbits(32)),
+            "reporting_source": "Facebook",
+            "location_ISO_code": None,
+            "claim_types": ["Event/Property Claim"],
+            "fact_checking_strategies": ["Written Evidence"],
+            "questions": [{"question": sentence(rng, rng.randint(5, 15)) + "?",
+                           "answers": [make_answer(rng, answer_words)]}
+                          for _ in range(rng.randint(*questions))],
+            "cached_original_claim_url": None,
+        })
+    return gold
+
+
+def make_submission(gold, rng, questions, answer_words, label_accuracy):
+    labels = list(main.EV2REvaluator.verdicts)
+    submission = []
+    for i, tgt in enumerate(gold):
+        label = tgt["label"] if rng.random() < label_accuracy else rng.choice(labels)
+        submission.append({
+            "claim_id": i,
+            "claim": tgt["claim"],
+            "pred_label": label,
+            "evidence": [{"question": sentence(rng, rng.randint(5, 15)) + "?",
+                          "answer": sentence(rng, rng.randint(*answer_words))}
+                         for _ in range(rng.randint(*questions))],
+        })
+    return submission
+
+
+class FakeLLMEvaluator(main.EV2REvaluator):
+    """EV2R with a fake model: every request waits `latency` seconds and returns a response whose
+    fact counts are derived from the prompt, so runs are deterministic."""
+
+    latency = 0.0
+
+    def query_gemini(self, prompt, model=None):
+        if self.latency:
+            time.sleep(self.latency)
+        seed = int(hashlib.md5(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        facts = 2 + seed % 5
+        if self.is_reference_free():
+            return json.dumps({"facts count": facts, "support": seed % (facts + 1), "contradict": 0,
+                               "not enough evidence": facts - seed % (facts + 1)})
+        return json.dumps({"facts count predicted evidence": facts,
+                           "support predicted evidence": seed % (facts + 1),
+                           "facts count reference evidence": facts,
+                           "support reference evidence": (seed >> 8) % (facts + 1)})
+
+    def get_response_text(self, response):
+        return response
+
+
+@contextlib.contextmanager
+def fake_llm(latency):
+    """Makes evaluate() build FakeLLMEvaluator scorers."""
+    FakeLLMEvaluator.latency = latency
+    original = main.EV2REvaluator
+    main.EV2REvaluator = FakeLLMEvaluator
+    try:
+        yield
+    finally:
+        main.EV2REvaluator = original
+
+
+def run(n_claims, args, work_dir):
+    rng = random.Random(args.seed)
+    gold_file = os.path.join(work_dir, "gold_{}.json".format(n_claims))
+    submission_file = os.path.join(work_dir, "submission_{}.json".format(n_claims))
+    gold = make_gold(n_claims, rng, args.questions, args.answer_words)
+    with open(gold_file, "w") as f:
+        json.dump(gold, f)
+    with open(submission_file, "w") as f:
+        json.dump(make_submission(gold, rng, args.questions, args.answer_words, args.label_accuracy), f)
+
+    options = {"submission_metadata": {}, "max_claims": None, "stage_timings": True,
+               "bootstrap_resamples": args.bootstrap_resamples, "averitec_scores": args.averitec}
+    # evaluate() prints a line per request; only the timings are of interest here
+    with fake_llm(args.latency), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        output = main.evaluate(gold_file, submission_file, "dev", **options)
+        total = time.perf_counter() - start
+    return {
+        "claims": n_claims,
+        "wall_time": total,
+        "stages": output["submission_metadata"]["stage_timings"],
+        "score": float(output["submission_result"]["EV2R Score"]),
+        "gold_file_mb": os.path.getsize(gold_file) / 1e6,
+    }
+
+
+def compare(results, baseline, tolerance, min_time):
+    """Prints the wall time ratio of every stage to the baseline; returns the regressed stages."""
+    regressions = []
+    for size, run_result in results["runs"].items():
+        base_run = baseline["runs"].get(size)
+        if base_run is None:
+            print("{:>6} claims: not in the baseline".format(size))
+            continue
+        rows = [("total", run_result["wall_time"], base_run["wall_time"])]
+        rows += [(stage, timing["wall_time"], base_run["stages"][stage]["wall_time"])
+                 for stage, timing in run_result["stages"].items() if stage in base_run["stages"]]
+        for stage, wall_time, base_time in rows:
+            ratio = wall_time / base_time if base_time else float("inf")
+            regressed = base_time >= min_time and ratio > 1 + tolerance
+            if regressed:
+                regressions.append((size, stage, ratio))
+            print("{:>6} claims  {:<20} {:9.3f}s  baseline {:9.3f}s  x{:5.2f}{}".format(
+                size, stage, wall_time, base_time, ratio, "  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake LLM request")
+    parser.add_argument("--questions", type=int, nargs=2, default=[1, 5], metavar=("MIN", "MAX"),
+                        help="questions per gold claim and per prediction")
+    parser.add_argument("--answer-words", type=int, nargs=2, default=[5, 60], metavar=("MIN", "MAX"))
+    parser.add_argument("--label-accuracy", type=float, default=0.6)
+    parser.add_argument("--bootstrap-resamples", type=int, default=1000)
+    parser.add_argument("--averitec", action="store_true", help="also time the METEOR-based scores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="json file to store the results in")
+    parser.add_argument("--compare", help="results of an earlier --save to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown per stage")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="stages faster than this in the baseline are not checked")
+    args = parser.parse_args()
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("save", "compare")},
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_evaluation_") as work_dir:
+        for n_claims in args.sizes:
+            run_result = run(n_claims, args, work_dir)
+            results["runs"][str(n_claims)] = run_result
+            print("{:>6} claims: {:.2f}s total, {:.1f} MB gold file".format(
+                n_claims, run_result["wall_time"], run_result["gold_file_mb"]))
+            for stage, timing in run_result["stages"].items():
+                print("    {:<20} wall {:9.3f}s  cpu {:9.3f}s".format(stage, timing["wall_time"], timing["cpu_time"]))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1)
+        print("Results saved to {}".format(args.save))
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_time)
+        if regressions:
+            print("{} stage(s) slower than the baseline by more than {:.0%}".format(len(regressions), args.tolerance))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -2,9 +2,11 @@ import evaluation_pb2
 import evaluation_pb2_grpc
 import grpc
 import os
-import pickle
+import queue
 import time
 
+from serialization import pack_step_batch, unpack_feedback
+
 time.sleep(30)
 
 LOCAL_EVALUATION = os.environ.get("LOCAL_EVALUATION")
@@ -17,22 +19,39 @@ else:
 stub = evaluation_pb2_grpc.EnvironmentStub(channel)
 
 
-def pack_for_grpc(entity):
-    return pickle.dumps(entity)
-
-
-def unpack_for_grpc(entity):
-    return pickle.loads(entity)
-
-
-flag = None
-
-while not flag:
-    base = unpack_for_grpc(
-        stub.act_on_environment(
-            evaluation_pb2.Package(SerializedEntity=pack_for_grpc(1))
-        ).SerializedEntity
-    )
-    flag = base["feedback"][2]
-    print("Agent Feedback", base["feedback"])
-    print("*" * 100)
+# Actions go to the environment over one stream_steps call: each put is one message with one
+# action per environment instance (env_indices), applied by the environment in order.
+actions = queue.Queue()
+
+
+def action_stream():
+    while True:
+        batch = actions.get()
+        if batch is None:
+            return
+        yield batch
+
+
+info = stub.get_environment_info(evaluation_pb2.Empty())
+running = [message.env_index for message in stub.reset_environments(evaluation_pb2.EnvIndices()).feedback]
+episodes = 0
+actions.put(pack_step_batch([1] * len(running), env_indices=running))
+
+for response in stub.stream_steps(action_stream()):
+    finished = []
+    for message in response.feedback:
+        feedback, current_score = unpack_feedback(message)
+        if feedback[2]:
+            finished.append(message.env_index)
+            print("Agent Feedback", message.env_index, feedback)
+            print("*" * 100)
+    episodes += len(finished)
+    if episodes >= info.num_episodes:
+        actions.put(None)
+        break
+    if finished:
+        # Instances left done once the episode budget is used up drop out
+        restarted = stub.reset_environments(evaluation_pb2.EnvIndices(env_indices=finished)).feedback
+        running = [index for index in running if index not in finished]
+        running += [message.env_index for message in restarted if not message.done]
+    actions.put(pack_step_batch([1] * len(running), env_indices=running))
@@ -1,10 +1,10 @@
 import grpc
 import gym
-import pickle
 import sys
 import os
 import requests
 import json
+import threading
 
 from environment_utils import EvalAI_Interface
 
@@ -13,9 +13,15 @@ import time
 
 import evaluation_pb2
 import evaluation_pb2_grpc
+from serialization import apply_step_batch, pack_feedback, serve_step_batches, unpack_action
 
 LOCAL_EVALUATION = os.environ.get("LOCAL_EVALUATION")
 EVALUATION_COMPLETED = False
+# Each open stream_steps call holds a worker thread; steps are serialized by Environment.lock
+MAX_WORKERS = 4
+# Episodes scored per submission, run on up to NUM_ENVIRONMENTS environment instances at once
+NUM_EPISODES = int(os.environ.get("NUM_EPISODES", 1))
+NUM_ENVIRONMENTS = int(os.environ.get("NUM_ENVIRONMENTS", 1))
 
 
 class evaluator_environment:
@@ -23,7 +29,7 @@ class evaluator_environment:
         self.score = 0
         self.feedback = None
         self.env = gym.make(environment)
-        self.env.reset()
+        self.observation = self.env.reset()
 
     def get_action_space(self):
         return list(range(self.env.action_space.n))
@@ -31,6 +37,62 @@ class evaluator_environment:
     def next_score(self):
         self.score += 1
 
+    def reset(self):
+        self.score = 0
+        self.feedback = None
+        self.observation = self.env.reset()
+
+    def done(self):
+        return bool(self.feedback and self.feedback[2])
+
+
+class vector_environment:
+    """Independent environment instances addressed by index, with the scores of finished episodes.
+
+    At most num_episodes episodes are started in total, so an environment whose episode ends once
+    the budget is used up stays done. Only starting the budgeted episodes keeps the score unbiased:
+    stopping at the first num_episodes finished ones would favour short episodes.
+    """
+
+    def __init__(self, num_environments, num_episodes, environment="CartPole-v0"):
+        num_environments = max(1, min(num_environments, num_episodes))
+        self.envs = [evaluator_environment(environment) for _ in range(num_environments)]
+        self.num_episodes = num_episodes
+        self.episodes_started = num_environments
+        self.episode_scores = []
+
+    def reset(self, index):
+        """Starts a new episode if the budget allows; an unfinished episode is restarted for free."""
+        instance = self.envs[index]
+        if instance.done():
+            if self.episodes_started >= self.num_episodes:
+                return False
+            self.episodes_started += 1
+        instance.reset()
+        return True
+
+    def step(self, index, action):
+        """Steps one instance; returns True when this step finished the last budgeted episode."""
+        instance = self.envs[index]
+        if instance.done():
+            return False
+        instance.next_score()
+        instance.feedback = instance.env.step(action)
+        if instance.done():
+            self.episode_scores.append(instance.score)
+        return len(self.episode_scores) == self.num_episodes and instance.done()
+
+    def summary(self):
+        scores = self.episode_scores
+        mean = sum(scores) / float(len(scores))
+        return {
+            "score": mean,
+            "std": (sum((score - mean) ** 2 for score in scores) / len(scores)) ** 0.5,
+            "min": min(scores),
+            "max": max(scores),
+            "episodes": len(scores),
+        }
+
 
 class Environment(evaluation_pb2_grpc.EnvironmentServicer):
     def __init__(self, challenge_pk, phase_pk, submission_pk, server):
@@ -38,53 +100,71 @@ class Environment(evaluation_pb2_grpc.EnvironmentServicer):
         self.phase_pk = phase_pk
         self.submission_pk = submission_pk
         self.server = server
+        self.lock = threading.Lock()
 
     def get_action_space(self, request, context):
-        message = pack_for_grpc(env.get_action_space())
-        return evaluation_pb2.Package(SerializedEntity=message)
+        return evaluation_pb2.ActionSpace(actions=envs.envs[0].get_action_space())
+
+    def get_environment_info(self, request, context):
+        return evaluation_pb2.EnvironmentInfo(num_environments=len(envs.envs), num_episodes=envs.num_episodes)
 
     def act_on_environment(self, request, context):
+        return self.step(0, unpack_action(request))
+
+    def stream_steps(self, request_iterator, context):
+        batches = (self.check_indices(batch, context) for batch in request_iterator)
+        return serve_step_batches(batches, self.step)
+
+    def step_environments(self, request, context):
+        return apply_step_batch(self.check_indices(request, context), self.step)
+
+    def reset_environments(self, request, context):
+        indices = self.check_indices(request, context).env_indices or range(len(envs.envs))
+        response = evaluation_pb2.FeedbackBatch()
+        with self.lock:
+            for index in indices:
+                instance = envs.envs[index]
+                if envs.reset(index):
+                    feedback = (instance.observation, 0.0, False, {})
+                else:
+                    feedback = instance.feedback
+                pack_feedback(feedback, instance.score, response.feedback.add(), index)
+        return response
+
+    def check_indices(self, message, context):
+        if any(index < 0 or index >= len(envs.envs) for index in message.env_indices):
+            context.abort(grpc.StatusCode.OUT_OF_RANGE,
+                          "env_indices must be in [0, {})".format(len(envs.envs)))
+        return message
+
+    def step(self, index, action, message=None):
         global EVALUATION_COMPLETED
-        if not env.feedback or not env.feedback[2]:
-            action = unpack_for_grpc(request.SerializedEntity)
-            env.next_score()
-            env.feedback = env.env.step(action)
-        if env.feedback[2]:
-            if not LOCAL_EVALUATION:
-                update_submission_result(
-                    env, self.challenge_pk, self.phase_pk, self.submission_pk
-                )
-            else:
-                print("Final Score: {0}".format(env.score))
-                print("Stopping Evaluation!")
-                EVALUATION_COMPLETED = True
-        return evaluation_pb2.Package(
-            SerializedEntity=pack_for_grpc(
-                {"feedback": env.feedback, "current_score": env.score,}
-            )
-        )
-
-
-env = evaluator_environment()
+        with self.lock:
+            instance = envs.envs[index]
+            if envs.step(index, action):
+                if not LOCAL_EVALUATION:
+                    update_submission_result(
+                        envs, self.challenge_pk, self.phase_pk, self.submission_pk
+                    )
+                else:
+                    print("Final Score: {0}".format(envs.summary()))
+                    print("Stopping Evaluation!")
+                    EVALUATION_COMPLETED = True
+            return pack_feedback(instance.feedback, instance.score, message, index)
+
+
+envs = vector_environment(NUM_ENVIRONMENTS, NUM_EPISODES)
 api = EvalAI_Interface(
     AUTH_TOKEN=os.environ.get("AUTH_TOKEN", "x"),
     EVALAI_API_SERVER=os.environ.get("EVALAI_API_SERVER", "http://localhost:8000"),
 )
 
 
-def pack_for_grpc(entity):
-    return pickle.dumps(entity)
-
-
-def unpack_for_grpc(entity):
-    return pickle.loads(entity)
-
-
 def get_action_space(env):
     return list(range(env.action_space.n))
 
 
-def update_submission_result(env, challenge_pk, phase_pk, submission_pk):
+def update_submission_result(envs, challenge_pk, phase_pk, submission_pk):
     submission_data = {
         "submission_status": "finished",
         "submission": submission_pk,
@@ -100,7 +180,7 @@ def update_submission_result(env, challenge_pk, phase_pk, submission_pk):
                 {
                     "split": "train_split",
                     "show_to_participant": True,
-                    "accuracies": {"score": env.score},
+                    "accuracies": {"score": envs.summary()["score"]},
                 }
             ]
         ),
@@ -126,7 +206,7 @@ def main():
         phase_pk = "1"
         submission_pk = "1"
 
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=MAX_WORKERS))
     evaluation_pb2_grpc.add_EnvironmentServicer_to_server(
         Environment(challenge_pk, phase_pk, submission_pk, server), server
     )
@@ -1,13 +1,12 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: evaluation.proto
-
-import sys
-_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
+# Protobuf Python Version: 4.25.1
+"""Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
@@ -15,89 +14,31 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='evaluation.proto',
-  package='evaluation',
-  syntax='proto3',
-  serialized_options=None,
-  serialized_pb=_b('\n\x10\x65valuation.proto\x12\nevaluation\"#\n\x07Package\x12\x18\n\x10SerializedEntity\x18\x01 \x01(\x0c\x32\x8f\x01\n\x0b\x45nvironment\x12>\n\x10get_action_space\x12\x13.evaluation.Package\x1a\x13.evaluation.Package\"\x00\x12@\n\x12\x61\x63t_on_environment\x12\x13.evaluation.Package\x1a\x13.evaluation.Package\"\x00\x62\x06proto3')
-)
-
-
-
-
-_PACKAGE = _descriptor.Descriptor(
-  name='Package',
-  full_name='evaluation.Package',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='SerializedEntity', full_name='evaluation.Package.SerializedEntity', index=0,
-      number=1, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b(""),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=32,
-  serialized_end=67,
-)
-
-DESCRIPTOR.message_types_by_name['Package'] = _PACKAGE
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Package = _reflection.GeneratedProtocolMessageType('Package', (_message.Message,), {
-  'DESCRIPTOR' : _PACKAGE,
-  '__module__' : 'evaluation_pb2'
-  # @@protoc_insertion_point(class_scope:evaluation.Package)
-  })
-_sym_db.RegisterMessage(Package)
-
-
-
-_ENVIRONMENT = _descriptor.ServiceDescriptor(
-  name='Environment',
-  full_name='evaluation.Environment',
-  file=DESCRIPTOR,
-  index=0,
-  serialized_options=None,
-  serialized_start=70,
-  serialized_end=213,
-  methods=[
-  _descriptor.MethodDescriptor(
-    name='get_action_space',
-    full_name='evaluation.Environment.get_action_space',
-    index=0,
-    containing_service=None,
-    input_type=_PACKAGE,
-    output_type=_PACKAGE,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='act_on_environment',
-    full_name='evaluation.Environment.act_on_environment',
-    index=1,
-    containing_service=None,
-    input_type=_PACKAGE,
-    output_type=_PACKAGE,
-    serialized_options=None,
-  ),
-])
-_sym_db.RegisterServiceDescriptor(_ENVIRONMENT)
-
-DESCRIPTOR.services_by_name['Environment'] = _ENVIRONMENT
-
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x10\x65valuation.proto\x12\nevaluation\"\x07\n\x05\x45mpty\"4\n\x06Tensor\x12\r\n\x05\x64type\x18\x01 \x01(\t\x12\r\n\x05shape\x18\x02 \x03(\x03\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"\x1e\n\x0b\x41\x63tionSpace\x12\x0f\n\x07\x61\x63tions\x18\x01 \x03(\x03\"O\n\x06\x41\x63tion\x12\x12\n\x08\x64iscrete\x18\x01 \x01(\x03H\x00\x12(\n\ncontinuous\x18\x02 \x01(\x0b\x32\x12.evaluation.TensorH\x00\x42\x07\n\x05value\"\x89\x01\n\x08\x46\x65\x65\x64\x62\x61\x63k\x12\'\n\x0bobservation\x18\x01 \x01(\x0b\x32\x12.evaluation.Tensor\x12\x0e\n\x06reward\x18\x02 \x01(\x01\x12\x0c\n\x04\x64one\x18\x03 \x01(\x08\x12\x0c\n\x04info\x18\x04 \x01(\t\x12\x15\n\rcurrent_score\x18\x05 \x01(\x03\x12\x11\n\tenv_index\x18\x06 \x01(\x03\"E\n\tStepBatch\x12#\n\x07\x61\x63tions\x18\x01 \x03(\x0b\x32\x12.evaluation.Action\x12\x13\n\x0b\x65nv_indices\x18\x02 \x03(\x03\"!\n\nEnvIndices\x12\x13\n\x0b\x65nv_indices\x18\x01 \x03(\x03\"A\n\x0f\x45nvironmentInfo\x12\x18\n\x10num_environments\x18\x01 \x01(\x03\x12\x14\n\x0cnum_episodes\x18\x02 \x01(\x03\"7\n\rFeedbackBatch\x12&\n\x08\x66\x65\x65\x64\x62\x61\x63k\x18\x01 \x03(\x0b\x32\x14.evaluation.Feedback2\xb7\x03\n\x0b\x45nvironment\x12@\n\x10get_action_space\x12\x11.evaluation.Empty\x1a\x17.evaluation.ActionSpace\"\x00\x12@\n\x12\x61\x63t_on_environment\x12\x12.evaluation.Action\x1a\x14.evaluation.Feedback\"\x00\x12\x46\n\x0cstream_steps\x12\x15.evaluation.StepBatch\x1a\x19.evaluation.FeedbackBatch\"\x00(\x01\x30\x01\x12H\n\x14get_environment_info\x12\x11.evaluation.Empty\x1a\x1b.evaluation.EnvironmentInfo\"\x00\x12I\n\x12reset_environments\x12\x16.evaluation.EnvIndices\x1a\x19.evaluation.FeedbackBatch\"\x00\x12G\n\x11step_environments\x12\x15.evaluation.StepBatch\x1a\x19.evaluation.FeedbackBatch\"\x00\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'evaluation_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_EMPTY']._serialized_start=32
+  _globals['_EMPTY']._serialized_end=39
+  _globals['_TENSOR']._serialized_start=41
+  _globals['_TENSOR']._serialized_end=93
+  _globals['_ACTIONSPACE']._serialized_start=95
+  _globals['_ACTIONSPACE']._serialized_end=125
+  _globals['_ACTION']._serialized_start=127
+  _globals['_ACTION']._serialized_end=206
+  _globals['_FEEDBACK']._serialized_start=209
+  _globals['_FEEDBACK']._serialized_end=346
+  _globals['_STEPBATCH']._serialized_start=348
+  _globals['_STEPBATCH']._serialized_end=417
+  _globals['_ENVINDICES']._serialized_start=419
+  _globals['_ENVINDICES']._serialized_end=452
+  _globals['_ENVIRONMENTINFO']._serialized_start=454
+  _globals['_ENVIRONMENTINFO']._serialized_end=519
+  _globals['_FEEDBACKBATCH']._serialized_start=521
+  _globals['_FEEDBACKBATCH']._serialized_end=576
+  _globals['_ENVIRONMENT']._serialized_start=579
+  _globals['_ENVIRONMENT']._serialized_end=1018
 # @@protoc_insertion_point(module_scope)
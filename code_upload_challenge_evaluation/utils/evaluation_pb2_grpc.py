@@ -1,63 +1,233 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
 
 import evaluation_pb2 as evaluation__pb2
 
 
 class EnvironmentStub(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def __init__(self, channel):
-    """Constructor.
-
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.get_action_space = channel.unary_unary(
-        '/evaluation.Environment/get_action_space',
-        request_serializer=evaluation__pb2.Package.SerializeToString,
-        response_deserializer=evaluation__pb2.Package.FromString,
-        )
-    self.act_on_environment = channel.unary_unary(
-        '/evaluation.Environment/act_on_environment',
-        request_serializer=evaluation__pb2.Package.SerializeToString,
-        response_deserializer=evaluation__pb2.Package.FromString,
-        )
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.get_action_space = channel.unary_unary(
+                '/evaluation.Environment/get_action_space',
+                request_serializer=evaluation__pb2.Empty.SerializeToString,
+                response_deserializer=evaluation__pb2.ActionSpace.FromString,
+                )
+        self.act_on_environment = channel.unary_unary(
+                '/evaluation.Environment/act_on_environment',
+                request_serializer=evaluation__pb2.Action.SerializeToString,
+                response_deserializer=evaluation__pb2.Feedback.FromString,
+                )
+        self.stream_steps = channel.stream_stream(
+                '/evaluation.Environment/stream_steps',
+                request_serializer=evaluation__pb2.StepBatch.SerializeToString,
+                response_deserializer=evaluation__pb2.FeedbackBatch.FromString,
+                )
+        self.get_environment_info = channel.unary_unary(
+                '/evaluation.Environment/get_environment_info',
+                request_serializer=evaluation__pb2.Empty.SerializeToString,
+                response_deserializer=evaluation__pb2.EnvironmentInfo.FromString,
+                )
+        self.reset_environments = channel.unary_unary(
+                '/evaluation.Environment/reset_environments',
+                request_serializer=evaluation__pb2.EnvIndices.SerializeToString,
+                response_deserializer=evaluation__pb2.FeedbackBatch.FromString,
+                )
+        self.step_environments = channel.unary_unary(
+                '/evaluation.Environment/step_environments',
+                request_serializer=evaluation__pb2.StepBatch.SerializeToString,
+                response_deserializer=evaluation__pb2.FeedbackBatch.FromString,
+                )
 
 
 class EnvironmentServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
+    """Missing associated documentation comment in .proto file."""
+
+    def get_action_space(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def act_on_environment(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
-  def get_action_space(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+    def stream_steps(self, request_iterator, context):
+        """One long-lived call per episode instead of a round-trip per step
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
-  def act_on_environment(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+    def get_environment_info(self, request, context):
+        """Vectorized evaluation: several environment instances addressed by env index
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def reset_environments(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def step_environments(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_EnvironmentServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'get_action_space': grpc.unary_unary_rpc_method_handler(
-          servicer.get_action_space,
-          request_deserializer=evaluation__pb2.Package.FromString,
-          response_serializer=evaluation__pb2.Package.SerializeToString,
-      ),
-      'act_on_environment': grpc.unary_unary_rpc_method_handler(
-          servicer.act_on_environment,
-          request_deserializer=evaluation__pb2.Package.FromString,
-          response_serializer=evaluation__pb2.Package.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'evaluation.Environment', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'get_action_space': grpc.unary_unary_rpc_method_handler(
+                    servicer.get_action_space,
+                    request_deserializer=evaluation__pb2.Empty.FromString,
+                    response_serializer=evaluation__pb2.ActionSpace.SerializeToString,
+            ),
+            'act_on_environment': grpc.unary_unary_rpc_method_handler(
+                    servicer.act_on_environment,
+                    request_deserializer=evaluation__pb2.Action.FromString,
+                    response_serializer=evaluation__pb2.Feedback.SerializeToString,
+            ),
+            'stream_steps': grpc.stream_stream_rpc_method_handler(
+                    servicer.stream_steps,
+                    request_deserializer=evaluation__pb2.StepBatch.FromString,
+                    response_serializer=evaluation__pb2.FeedbackBatch.SerializeToString,
+            ),
+            'get_environment_info': grpc.unary_unary_rpc_method_handler(
+                    servicer.get_environment_info,
+                    request_deserializer=evaluation__pb2.Empty.FromString,
+                    response_serializer=evaluation__pb2.EnvironmentInfo.SerializeToString,
+            ),
+            'reset_environments': grpc.unary_unary_rpc_method_handler(
+                    servicer.reset_environments,
+                    request_deserializer=evaluation__pb2.EnvIndices.FromString,
+                    response_serializer=evaluation__pb2.FeedbackBatch.SerializeToString,
+            ),
+            'step_environments': grpc.unary_unary_rpc_method_handler(
+                    servicer.step_environments,
+                    request_deserializer=evaluation__pb2.StepBatch.FromString,
+                    response_serializer=evaluation__pb2.FeedbackBatch.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'evaluation.Environment', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class Environment(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def get_action_space(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/evaluation.Environment/get_action_space',
+            evaluation__pb2.Empty.SerializeToString,
+            evaluation__pb2.ActionSpace.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def act_on_environment(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/evaluation.Environment/act_on_environment',
+            evaluation__pb2.Action.SerializeToString,
+            evaluation__pb2.Feedback.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def stream_steps(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/evaluation.Environment/stream_steps',
+            evaluation__pb2.StepBatch.SerializeToString,
+            evaluation__pb2.FeedbackBatch.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def get_environment_info(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/evaluation.Environment/get_environment_info',
+            evaluation__pb2.Empty.SerializeToString,
+            evaluation__pb2.EnvironmentInfo.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def reset_environments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/evaluation.Environment/reset_environments',
+            evaluation__pb2.EnvIndices.SerializeToString,
+            evaluation__pb2.FeedbackBatch.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def step_environments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/evaluation.Environment/step_environments',
+            evaluation__pb2.StepBatch.SerializeToString,
+            evaluation__pb2.FeedbackBatch.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+
+import evaluation_pb2
+
+
+def fill_array(tensor, array):
+    """Writes array into a Tensor field in place; passing a built Tensor to a constructor copies it again."""
+    array = np.asarray(array)
+    tensor.dtype = array.dtype.str
+    tensor.shape.extend(array.shape)
+    tensor.data = array.tobytes()
+    return tensor
+
+
+def pack_array(array):
+    return fill_array(evaluation_pb2.Tensor(), array)
+
+
+def unpack_array(tensor):
+    # A read-only view of the received bytes; copy it before modifying it in place
+    return np.frombuffer(tensor.data, dtype=np.dtype(tensor.dtype)).reshape(tuple(tensor.shape))
+
+
+def pack_action(action, message=None):
+    if message is None:
+        message = evaluation_pb2.Action()
+    if isinstance(action, (int, np.integer)):
+        message.discrete = int(action)
+    else:
+        fill_array(message.continuous, action)
+    return message
+
+
+def unpack_action(message):
+    if message.WhichOneof("value") == "continuous":
+        return unpack_array(message.continuous)
+    return message.discrete
+
+
+def pack_feedback(feedback, current_score, message=None, env_index=0):
+    observation, reward, done, info = feedback
+    if message is None:
+        message = evaluation_pb2.Feedback()
+    message.reward = float(reward)
+    message.done = bool(done)
+    message.info = json.dumps(info, default=repr)
+    message.current_score = current_score
+    message.env_index = env_index
+    fill_array(message.observation, observation)
+    return message
+
+
+def unpack_feedback(message):
+    """(observation, reward, done, info) as returned by env.step, and the current score."""
+    feedback = (unpack_array(message.observation), message.reward, message.done, json.loads(message.info or "{}"))
+    return feedback, message.current_score
+
+
+def pack_step_batch(actions, env_indices=None):
+    message = evaluation_pb2.StepBatch()
+    for action in actions:
+        pack_action(action, message.actions.add())
+    if env_indices is not None:
+        message.env_indices.extend(env_indices)
+    return message
+
+
+def apply_step_batch(batch, step):
+    """Applies a StepBatch with step(env_index, action, message), which fills and returns the Feedback message."""
+    response = evaluation_pb2.FeedbackBatch()
+    if batch.env_indices:
+        for env_index, action in zip(batch.env_indices, batch.actions):
+            step(env_index, unpack_action(action), response.feedback.add())
+    else:
+        for action in batch.actions:
+            if step(0, unpack_action(action), response.feedback.add()).done:
+                break
+    return response
+
+
+def serve_step_batches(step_batches, step):
+    """Server side of stream_steps: the FeedbackBatch of every received StepBatch."""
+    for batch in step_batches:
+        yield apply_step_batch(batch, step)
@@ -39,6 +39,8 @@ install("numpy")
 install("aenum")
 # install("google-generativeai==0.8.3")
 # install("torch")
+# install("sentence-transformers")  # only for the "embedding" pairwise metric
+# install("transformers")  # only for the trained scorer (plus "onnxruntime" for its ONNX mode)
 
 # install("shapely==1.7.1")
 # install("requests==2.25.1")
@@ -0,0 +1,142 @@
+import functools
+import itertools
+
+import numpy as np
+import scipy.optimize
+
+# Matrices with more possible assignments than this are handed to scipy one by one.
+MAX_ENUMERATED_ASSIGNMENTS = 120
+# Shapes shared by fewer matrices than this are cheaper to solve one by one.
+MIN_BATCH_SIZE = 8
+# Upper bound on matrices x assignments x pairs evaluated in one vectorized step.
+MAX_CHUNK_CELLS = 1 << 22
+
+
+def solver_utility(pairwise_scores):
+    """Reference implementation: the sum of the scores picked by linear_sum_assignment."""
+    assignment = scipy.optimize.linear_sum_assignment(pairwise_scores, maximize=True)
+    return pairwise_scores[assignment[0], assignment[1]].sum()
+
+
+def closed_form_utility(pairwise_scores):
+    """Utility of matrices that need no solver (empty, all zero, single row or column), else None."""
+    if pairwise_scores.size == 0 or not np.count_nonzero(pairwise_scores):
+        return pairwise_scores.sum()
+    if pairwise_scores.shape[0] == 1 or pairwise_scores.shape[1] == 1:
+        return pairwise_scores.max()
+    return None
+
+
+def degenerate_utilities(matrices):
+    """Vectorized closed forms for a list of non-empty matrices.
+
+    When at most one row is not all zero (which includes a single row, and all-zero matrices)
+    or there is a single column, the solver picks the largest score and pairs every other row
+    with zeros, so the utility is the maximum of the matrix. Returns the maxima and the mask of
+    matrices for which that holds.
+    """
+    n_rows = np.array([m.shape[0] for m in matrices])
+    n_cols = np.array([m.shape[1] for m in matrices])
+    flat = np.concatenate([m.ravel() for m in matrices])
+    matrix_starts = np.concatenate([[0], np.cumsum(n_rows * n_cols)[:-1]])
+    row_starts = np.concatenate([[0], np.cumsum(np.repeat(n_cols, n_rows))[:-1]])
+
+    nonzero_rows = np.add.reduceat(flat != 0, row_starts) > 0
+    rows_with_scores = np.add.reduceat(nonzero_rows, np.concatenate([[0], np.cumsum(n_rows)[:-1]]))
+    maxima = np.maximum.reduceat(flat, matrix_starts)
+    return maxima, (rows_with_scores <= 1) | (n_cols == 1)
+
+
+def assignment_utility(pairwise_scores):
+    pairwise_scores = np.asarray(pairwise_scores, dtype=float)
+    utility = closed_form_utility(pairwise_scores)
+    if utility is None:
+        utility = solver_utility(pairwise_scores)
+    return utility
+
+
+@functools.lru_cache(maxsize=None)
+def enumerate_assignments(n_rows, n_cols):
+    """Row and column indices of every maximal one-to-one assignment, pairs sorted by row."""
+    if n_rows <= n_cols:
+        cols = np.array(list(itertools.permutations(range(n_cols), n_rows)), dtype=np.intp)
+        rows = np.broadcast_to(np.arange(n_rows), cols.shape)
+    else:
+        # Choose which rows get a column, then every way to hand out the columns to them
+        rows, cols = [], []
+        for chosen in itertools.combinations(range(n_rows), n_cols):
+            for perm in itertools.permutations(range(n_cols)):
+                rows.append(chosen)
+                cols.append(perm)
+        rows, cols = np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+    return np.ascontiguousarray(rows), np.ascontiguousarray(cols)
+
+
+def enumerated_utilities(stack):
+    """Utilities of a (n_matrices, n_rows, n_cols) stack by scoring every assignment at once.
+
+    Returns the utilities and a mask of the matrices whose optimum is tied or nearly tied with
+    another assignment; those are re-solved by scipy so that the picked pairs, and therefore the
+    summed utility, stay bit-identical to solver_utility.
+    """
+    rows, cols = enumerate_assignments(stack.shape[1], stack.shape[2])
+    totals = stack[:, rows, cols].sum(axis=2)
+    if totals.shape[1] > 1:
+        top_two = np.partition(totals, -2, axis=1)[:, -2:]
+        ambiguous = top_two[:, 1] - top_two[:, 0] <= 1e-9 * np.maximum(np.abs(top_two[:, 1]), 1.0)
+    else:
+        ambiguous = np.zeros(len(stack), dtype=bool)
+    best = totals.argmax(axis=1)
+    picked = stack[np.arange(len(stack))[:, None], rows[best], cols[best]]
+    return picked.sum(axis=1), ambiguous
+
+
+def batch_assignment_utilities(matrices):
+    """assignment_utility for many small matrices.
+
+    Degenerate matrices are resolved in closed form with a few vectorized reductions, equally
+    shaped matrices are solved together when the shape is shared by enough of them, and the
+    rest go through the solver.
+    """
+    matrices = [np.asarray(m, dtype=float) for m in matrices]
+    utilities = [None] * len(matrices)
+    non_empty = []
+    for i, matrix in enumerate(matrices):
+        if matrix.size == 0:
+            utilities[i] = matrix.sum()
+        else:
+            non_empty.append(i)
+    if not non_empty:
+        return utilities
+
+    maxima, degenerate = degenerate_utilities([matrices[i] for i in non_empty])
+    by_shape = {}
+    for i, maximum, closed_form in zip(non_empty, maxima, degenerate):
+        if closed_form:
+            utilities[i] = maximum
+        else:
+            by_shape.setdefault(matrices[i].shape, []).append(i)
+
+    for (n_rows, n_cols), indices in by_shape.items():
+        n_assignments = _count_assignments(n_rows, n_cols)
+        if n_assignments > MAX_ENUMERATED_ASSIGNMENTS or len(indices) < MIN_BATCH_SIZE:
+            for i in indices:
+                utilities[i] = solver_utility(matrices[i])
+            continue
+
+        chunk = max(1, MAX_CHUNK_CELLS // (n_assignments * min(n_rows, n_cols)))
+        for start in range(0, len(indices), chunk):
+            block = indices[start:start + chunk]
+            values, ambiguous = enumerated_utilities(np.stack([matrices[i] for i in block]))
+            for i, value, tied in zip(block, values, ambiguous):
+                utilities[i] = solver_utility(matrices[i]) if tied else value
+
+    return utilities
+
+
+def _count_assignments(n_rows, n_cols):
+    k, n = min(n_rows, n_cols), max(n_rows, n_cols)
+    count = 1
+    for i in range(k):
+        count *= n - i
+    return count
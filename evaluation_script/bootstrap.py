@@ -0,0 +1,101 @@
+import numpy as np
+
+# Per-claim record columns resampled by the bootstrap, and the score name they are reported under.
+BOOTSTRAP_COLUMNS = {
+    "ev2r_score": "EV2R Score",
+    "q_utility": "Q Score",
+    "qa_utility": "QA Score",
+    "averitec_score": "AVeriTeC Score",
+}
+# Upper bound on resamples x claims held in memory at once.
+MAX_CHUNK_CELLS = 1 << 22
+
+
+def score_matrix_from_records(records):
+    """Stacks the available per-claim score columns into an (n_claims, n_scores) matrix."""
+    names, columns = [], []
+    for key, name in BOOTSTRAP_COLUMNS.items():
+        if records and all(r.get(key) is not None for r in records):
+            names.append(name)
+            columns.append([float(r[key]) for r in records])
+
+    return names, np.array(columns, dtype=float).T.reshape(len(records), len(names))
+
+
+def align_records(records_a, records_b):
+    """Restricts two per-claim record lists to their shared claim ids, in the same order."""
+    index_b = {r["claim_id"]: r for r in records_b}
+    aligned_a = [r for r in records_a if r["claim_id"] in index_b]
+    aligned_b = [index_b[r["claim_id"]] for r in aligned_a]
+    return aligned_a, aligned_b
+
+
+def check_alignment(claim_ids, records_b, source):
+    """Raises a ValueError when a paired comparison with records_b would share no claim."""
+    ids_b = {r["claim_id"] for r in records_b}
+    if not any(claim_id in ids_b for claim_id in claim_ids):
+        raise ValueError("The per-claim scores in {} share no claim_id with this submission ({} and {} claims), "
+                         "so they cannot be compared".format(source, len(claim_ids), len(ids_b)))
+
+
+def resample_means(score_matrix, n_resamples=10000, seed=0):
+    """Column means of n_resamples bootstrap resamples of the claims, shape (n_resamples, n_scores).
+
+    Each resample is turned into a vector of claim counts with a single bincount, so the means
+    of a whole chunk of resamples come out of one matrix product.
+    """
+    score_matrix = np.asarray(score_matrix, dtype=float)
+    n_claims = score_matrix.shape[0]
+    if n_claims == 0:
+        raise ValueError("The bootstrap needs at least one claim")
+    rng = np.random.default_rng(seed)
+    chunk = max(1, MAX_CHUNK_CELLS // max(n_claims, 1))
+
+    means = np.empty((n_resamples, score_matrix.shape[1]))
+    for start in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - start)
+        idx = rng.integers(0, n_claims, size=(size, n_claims))
+        idx += np.arange(size)[:, None] * n_claims
+        counts = np.bincount(idx.ravel(), minlength=size * n_claims).reshape(size, n_claims)
+        means[start:start + size] = counts @ score_matrix / n_claims
+
+    return means
+
+
+def bootstrap_confidence_intervals(score_matrix, names, n_resamples=10000, confidence=0.95, seed=0):
+    score_matrix = np.asarray(score_matrix, dtype=float)
+    means = resample_means(score_matrix, n_resamples, seed)
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(means, [alpha, 1.0 - alpha], axis=0)
+
+    return {
+        name: {
+            "score": float(score_matrix[:, j].mean()),
+            "ci_low": float(low[j]),
+            "ci_high": float(high[j]),
+        }
+        for j, name in enumerate(names)
+    }
+
+
+def paired_bootstrap_test(score_matrix_a, score_matrix_b, names, n_resamples=10000, confidence=0.95, seed=0):
+    """Paired bootstrap over the claims shared by two submissions (rows must be aligned).
+
+    The p-value is two-sided: twice the fraction of resamples in which the difference
+    does not keep the sign of the observed difference.
+    """
+    differences = np.asarray(score_matrix_a, dtype=float) - np.asarray(score_matrix_b, dtype=float)
+    means = resample_means(differences, n_resamples, seed)
+    alpha = (1.0 - confidence) / 2.0
+    low, high = np.quantile(means, [alpha, 1.0 - alpha], axis=0)
+    p_values = 2.0 * np.minimum((means <= 0).mean(axis=0), (means >= 0).mean(axis=0))
+
+    return {
+        name: {
+            "difference": float(differences[:, j].mean()),
+            "ci_low": float(low[j]),
+            "ci_high": float(high[j]),
+            "p_value": float(min(p_values[j], 1.0)),
+        }
+        for j, name in enumerate(names)
+    }
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def claim_fingerprint(src, index=None):
+    """Hash of everything in a predicted claim that the per-claim scores depend on.
+
+    The EV2R prompts read the claim and the evidence, the AVeriTeC utilities the evidence and
+    string_evidence, and the verdict scores pred_label.
+    """
+    content = [src.get("claim_id", index), src.get("claim"), src.get("pred_label"), src.get("evidence"),
+               src.get("string_evidence")]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ClaimResultCache:
+    """Per-claim results of earlier evaluations against the same gold file.
+
+    Entries are keyed by claim_fingerprint and stored as an append-only jsonl file per
+    (gold file content, namespace), so a resubmission only re-scores the claims that changed.
+    """
+
+    def __init__(self, cache_dir, gold_file, namespace):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "{}_{}.jsonl".format(file_sha256(gold_file)[:16], namespace))
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A partially written last line from an interrupted run
+                        continue
+                    self.entries.setdefault(entry.pop("fingerprint"), {}).update(entry)
+
+    def get(self, src, index=None):
+        return dict(self.entries.get(claim_fingerprint(src, index), {}))
+
+    def update(self, src, index=None, **values):
+        values = {key: value for key, value in values.items() if value is not None}
+        if not values:
+            return
+        fingerprint = claim_fingerprint(src, index)
+        self.entries.setdefault(fingerprint, {}).update(values)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(dict(values, fingerprint=fingerprint)) + "\n")
+
+
+def content_hash(*parts):
+    return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LLM responses keyed by the content hash of what was sent to the model.
+
+    Always shared within a run; with a cache_dir, also persisted in an append-only jsonl file
+    per namespace and shared across runs and submissions.
+    """
+
+    def __init__(self, cache_dir=None, namespace="responses"):
+        self.path = None
+        self.responses = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.path = os.path.join(cache_dir, "{}.jsonl".format(namespace))
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue
+                        self.responses[entry["key"]] = entry["response"]
+
+    def get(self, key):
+        response = self.responses.get(key)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, key, response):
+        self.responses[key] = response
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "response": response}) + "\n")
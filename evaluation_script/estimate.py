@@ -0,0 +1,195 @@
+"""Cost and duration estimate of an EV2R evaluation, without calling the model.
+
+evaluate(dry_run=True) renders every prompt the run would send, counts its input tokens and
+applies the per-claim result cache, the fact cache and label_first exactly as a real run would.
+Output tokens, latency and, with the cascade, the escalation rate are predicted from the run
+metrics that real runs append to `run_metrics_file`, or from the defaults below without history.
+
+Input tokens are counted with `dry_run_tokenizer` when given ("tiktoken:<encoding>" or the path
+of a local transformers tokenizer), otherwise from the characters per token measured in the
+history (Gemini reports the token counts of every request), or DEFAULT_CHARS_PER_TOKEN.
+"""
+import json
+import math
+import os
+import time
+
+import evaluation_script.claim_cache as claim_cache
+import evaluation_script.labels as labels
+import evaluation_script.prompts as prompts
+
+# USD per million (input, output) tokens, for prompts up to 128k tokens
+PRICES = {
+    "models/gemini-1.5-pro": (1.25, 5.00),
+    "models/gemini-1.5-flash": (0.075, 0.30),
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+DEFAULT_OUTPUT_TOKENS = 100
+DEFAULT_LATENCY = 8.0
+DEFAULT_ESCALATION_RATE = 0.3
+# EV2R sends its requests one at a time
+DEFAULT_CONCURRENCY = 1
+
+
+def model_name(model):
+    return getattr(model, "model_name", str(model))
+
+
+class TokenCounter:
+
+    def __init__(self, tokenizer=None, chars_per_token=None):
+        self.chars_per_token = chars_per_token or DEFAULT_CHARS_PER_TOKEN
+        self.encode = None
+        self.name = "{:.2f} characters per token".format(self.chars_per_token)
+        if tokenizer and tokenizer.startswith("tiktoken:"):
+            import tiktoken
+            self.encode = tiktoken.get_encoding(tokenizer[len("tiktoken:"):]).encode
+            self.name = tokenizer
+        elif tokenizer:
+            from transformers import AutoTokenizer
+            self.encode = AutoTokenizer.from_pretrained(tokenizer).encode
+            self.name = tokenizer
+
+    def count(self, text):
+        if self.encode is not None:
+            return len(self.encode(text))
+        return int(math.ceil(len(text) / self.chars_per_token))
+
+
+def append_run_metrics(path, metrics):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(dict(metrics, time=time.strftime("%Y-%m-%dT%H:%M:%S"))) + "\n")
+
+
+def load_history(path, prompt_type=None):
+    """Per-request averages over the runs of a run metrics file that used prompt_type."""
+    totals = {"runs": 0, "llm_requests": 0, "llm_wait": 0.0, "escalation_claims": 0, "escalated": 0}
+    models = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    run = json.loads(line)
+                except ValueError:
+                    continue
+                if prompt_type is not None and run.get("prompt_type") != prompt_type:
+                    continue
+                totals["runs"] += 1
+                totals["llm_requests"] += run["llm_requests"]
+                totals["llm_wait"] += run["llm_wait"]
+                if "ev2r_cascade" in run:
+                    totals["escalation_claims"] += run["ev2r_cascade"]["claims"]
+                    totals["escalated"] += run["ev2r_cascade"]["escalated"]
+                for name, usage in run["models"].items():
+                    model = models.setdefault(name, {"requests": 0, "input_chars": 0, "input_tokens": 0,
+                                                     "output_tokens": 0})
+                    for key in model:
+                        model[key] += usage[key]
+
+    input_chars = sum(model["input_chars"] for model in models.values())
+    input_tokens = sum(model["input_tokens"] for model in models.values())
+    return {
+        "runs": totals["runs"],
+        "chars_per_token": input_chars / input_tokens if input_tokens else None,
+        "latency": totals["llm_wait"] / totals["llm_requests"] if totals["llm_requests"] else None,
+        "escalation_rate": totals["escalated"] / totals["escalation_claims"] if totals["escalation_claims"] else None,
+        "output_tokens": {name: model["output_tokens"] / model["requests"]
+                          for name, model in models.items() if model["requests"]},
+    }
+
+
+def makespan(n_requests, latency, concurrency, requests_per_minute=None):
+    """Seconds to send n_requests of `latency` seconds each, `concurrency` at a time, under a rate limit."""
+    duration = math.ceil(n_requests / float(max(concurrency, 1))) * latency
+    if requests_per_minute:
+        duration = max(duration, 60.0 * n_requests / requests_per_minute)
+    return duration
+
+
+def dry_run(test_annotation_file, user_submission_file, phase_codename, **kwargs):
+    """The requests, tokens, cost and duration of evaluate() with these options, as {"dry_run": report}."""
+    import evaluation_script.main as main
+
+    predictions, references = main.load_claims(test_annotation_file, user_submission_file, kwargs.get("claim_range"),
+                                               kwargs.get("max_claims", main.MAX_CLAIMS))
+    scorer = main.build_ev2r_scorer(kwargs)
+    scorer.prompt_store = prompts.get_prompt_store(test_annotation_file, scorer.prompt_type,
+                                                   kwargs.get("prompt_store_dir"))
+    history = load_history(kwargs.get("run_metrics_file"), scorer.prompt_type.value)
+    counter = TokenCounter(kwargs.get("dry_run_tokenizer"), history["chars_per_token"])
+
+    todo = list(range(len(predictions)))
+    if kwargs.get("result_cache_dir"):
+        cache = claim_cache.ClaimResultCache(kwargs["result_cache_dir"], test_annotation_file,
+                                             scorer.get_cache_namespace())
+        todo = [i for i in todo if cache.get(predictions[i], i).get("ev2r_recall") is None]
+
+    n_requests, input_tokens, label_skipped, fact_cache_hits = 0, 0, 0, 0
+    seen = set()
+    pairs = scorer.iter_dataset([predictions[i] for i in todo], [references[i] for i in todo],
+                                with_reference_evidence=False)
+    for pred_sample, tgt_sample in pairs:
+        if scorer.label_first and not scorer.full_report and not labels.same_label(pred_sample.label, tgt_sample.label):
+            label_skipped += 1
+            continue
+        if scorer.fact_cache is not None:
+            key = claim_cache.content_hash(tgt_sample.claim, pred_sample.evidence)
+            if key in seen or key in scorer.fact_cache.responses:
+                fact_cache_hits += 1
+                continue
+            seen.add(key)
+        n_requests += 1
+        input_tokens += counter.count(scorer.prepare_prompt(tgt_sample, pred_sample))
+
+    # Requests per model: the cascade sends every claim to the fast model and escalates a share
+    escalation_rate = None
+    if scorer.cascade:
+        escalation_rate = history["escalation_rate"]
+        if escalation_rate is None:
+            escalation_rate = DEFAULT_ESCALATION_RATE
+        shares = {model_name(scorer.GEMINI_FAST_MODEL): 1.0, model_name(scorer.GEMINI_MODEL): escalation_rate}
+    else:
+        shares = {model_name(scorer.GEMINI_MODEL): 1.0}
+
+    prices = dict(PRICES, **kwargs.get("dry_run_prices", {}))
+    models = {}
+    for name, share in shares.items():
+        requests = n_requests * share
+        output_tokens = requests * history["output_tokens"].get(name, DEFAULT_OUTPUT_TOKENS)
+        input_price, output_price = prices.get(name, (0.0, 0.0))
+        models[name] = {
+            "requests": requests,
+            "input_tokens": input_tokens * share,
+            "output_tokens": output_tokens,
+            "cost_usd": (input_tokens * share * input_price + output_tokens * output_price) / 1e6,
+            "priced": name in prices,
+        }
+
+    latency = history["latency"] or DEFAULT_LATENCY
+    concurrency = kwargs.get("dry_run_concurrency", DEFAULT_CONCURRENCY)
+    requests_per_minute = kwargs.get("dry_run_requests_per_minute")
+    total_requests = sum(model["requests"] for model in models.values())
+    report = {
+        "claims": len(predictions),
+        "cached_claims": len(predictions) - len(todo),
+        "label_first_skipped": label_skipped,
+        "fact_cache_hits": fact_cache_hits,
+        "requests": total_requests,
+        "models": models,
+        "cost_usd": sum(model["cost_usd"] for model in models.values()),
+        "makespan_seconds": makespan(total_requests, latency, concurrency, requests_per_minute),
+        "assumptions": {
+            "tokenizer": counter.name,
+            "latency_per_request": latency,
+            "output_tokens_per_request": {name: history["output_tokens"].get(name, DEFAULT_OUTPUT_TOKENS)
+                                          for name in models},
+            "escalation_rate": escalation_rate,
+            "concurrency": concurrency,
+            "requests_per_minute": requests_per_minute,
+            "history_runs": history["runs"],
+        },
+    }
+    print("Dry run of {} for phase {}: {}".format(user_submission_file, phase_codename, report))
+    return {"dry_run": report}
@@ -0,0 +1,81 @@
+"""Verdict labels as small integers, for comparing predicted and gold verdicts.
+
+properties.Label knows the aliases of every verdict, but an enum value lookup per claim is slow
+and Label merges "Conflicting Evidence/Cherrypicking" into NEI. LABEL_TABLE is built once from
+it and maps every case-folded alias to the index of its verdict in VERDICTS, keeping the four
+AVeriTeC verdicts apart, so a whole label column becomes an int8 array and label agreement is
+one array comparison.
+"""
+import numpy as np
+
+import evaluation_script.properties as properties
+
+VERDICTS = [
+    "Supported",
+    "Refuted",
+    "Not Enough Evidence",
+    "Conflicting Evidence/Cherrypicking",
+]
+UNKNOWN = -1
+# Label members and their verdict; the aliases of NEI listed in CONFLICTING_ALIASES are conflicting evidence
+MEMBER_VERDICTS = {
+    properties.Label.SUPPORTED: "Supported",
+    properties.Label.REFUTED: "Refuted",
+    properties.Label.NEI: "Not Enough Evidence",
+}
+CONFLICTING_ALIASES = {
+    "conflicting evidence/cherrypicking",
+    "conflicting/cherry-picking",
+    "contradicting information (some evidence parts support the claim whereas others refute it)",
+}
+
+
+def normalize(label):
+    return str(label).strip().casefold()
+
+
+def build_label_table():
+    table = {normalize(verdict): code for code, verdict in enumerate(VERDICTS)}
+    conflicting = VERDICTS.index("Conflicting Evidence/Cherrypicking")
+    for member, verdict in MEMBER_VERDICTS.items():
+        for value in member.values:
+            alias = normalize(value)
+            table.setdefault(alias, conflicting if alias in CONFLICTING_ALIASES else VERDICTS.index(verdict))
+    return table
+
+
+LABEL_TABLE = build_label_table()
+# Raw label values seen so far, so that a label is normalized only once per process. Keyed with
+# the type, as 2, 2.0 and True would share an entry otherwise but normalize differently
+_CODES = {}
+
+
+def label_code(label):
+    """The verdict code of a raw label, UNKNOWN if it is none; validation uses it as well."""
+    key = (type(label), label)
+    try:
+        code = _CODES.get(key)
+    except TypeError:
+        # Unhashable values (lists, objects) in a submission are never verdicts
+        return UNKNOWN
+    if code is None:
+        code = LABEL_TABLE.get(normalize(label), UNKNOWN)
+        _CODES[key] = code
+    return code
+
+
+def label_codes(labels):
+    """int8 array of the verdict codes of a label column, UNKNOWN for unknown labels."""
+    return np.array(list(map(label_code, labels)), dtype=np.int8)
+
+
+def same_label(pred_label, gold_label):
+    code = label_code(gold_label)
+    return code != UNKNOWN and label_code(pred_label) == code
+
+
+def label_agreement(srcs, tgts):
+    """Boolean array: whether each predicted verdict (pred_label) matches its gold verdict (label)."""
+    pred_codes = label_codes([src["pred_label"] for src in srcs])
+    gold_codes = label_codes([tgt["label"] for tgt in tgts])
+    return (pred_codes == gold_codes) & (gold_codes != UNKNOWN)
@@ -1,12 +1,28 @@
 import json
+import os
+import threading
 import numpy as np
-import scipy
 import nltk
 from nltk import word_tokenize
 import tqdm
 import time
 import copy
+import evaluation_script.assignment as assignment
+import evaluation_script.prompts as prompts
 import evaluation_script.properties as properties
+import evaluation_script.bootstrap as bootstrap
+import evaluation_script.claim_cache as claim_cache
+import evaluation_script.estimate as estimate
+import evaluation_script.labels as labels
+import evaluation_script.memory as memory
+import evaluation_script.metrics as metrics
+import evaluation_script.profiling as profiling
+import evaluation_script.service as service
+import evaluation_script.sharding as sharding
+import evaluation_script.sweep as sweep
+import evaluation_script.timings as timings
+import evaluation_script.trained_scorer as trained_scorer
+import evaluation_script.validation as validation
 import google.generativeai as genai
 nltk.download('punkt')
 nltk.download('wordnet')
@@ -16,7 +32,25 @@ def pairwise_meteor(candidate, reference):
     return nltk.translate.meteor_score.single_meteor_score(word_tokenize(reference), word_tokenize(candidate))
 
 
+def warm_up_nltk():
+    """Loads WordNet and the punkt tokenizer now rather than on the first METEOR score.
+
+    NLTK's LazyCorpusLoader is not thread-safe on its first load, so the evaluation service
+    calls this before its worker threads start. Returns False if the data is not installed.
+    """
+    try:
+        nltk.corpus.wordnet.ensure_loaded()
+        pairwise_meteor("The claim is supported.", "The claim is refuted.")
+    except LookupError as e:
+        print("NLTK data for METEOR is not available: {}".format(e))
+        return False
+    return True
+
+
 def compute_all_pairwise_scores(src_data, tgt_data, metric):
+    if hasattr(metric, "score_matrix"):
+        return metric.score_matrix(src_data, tgt_data)
+
     scores = np.empty((len(src_data), len(tgt_data)))
 
     for i, src in enumerate(src_data):
@@ -26,14 +60,46 @@ def compute_all_pairwise_scores(src_data, tgt_data, metric):
     return scores
 
 
+# Names of the pairwise metrics of AVeriTeCEvaluator, the values of `averitec_metric`
+METEOR_METRIC = "meteor"
+BLEU_METRIC = "bleu"
+ROUGE_METRIC = "rouge"
+EMBEDDING_METRIC = "embedding"
+
+# Pairwise metrics for AVeriTeCEvaluator: name -> factory taking the metric options
+PAIRWISE_METRICS = {
+    METEOR_METRIC: lambda **options: pairwise_meteor,
+    BLEU_METRIC: lambda **options: metrics.pairwise_bleu,
+    ROUGE_METRIC: lambda **options: metrics.pairwise_rouge,
+    EMBEDDING_METRIC: metrics.EmbeddingSimilarity,
+}
+
+
+def register_pairwise_metric(name, factory):
+    PAIRWISE_METRICS[name] = factory
+
+
+def utility_cache_prefix(metric, metric_options):
+    """Prefix of the Q and QA utility keys of a pairwise metric in the per-claim result cache.
+
+    The options (e.g. the embedding model) change the utilities, so they are part of it.
+    """
+    if not metric_options:
+        return metric
+    return "{}_{}".format(metric, claim_cache.content_hash(json.dumps(metric_options, sort_keys=True))[:16])
+
+
+def reweight_utilities(utilities, reweight_terms):
+    reweighted = []
+    for assignment_utility, reweight_term in zip(utilities, reweight_terms):
+        assignment_utility *= reweight_term
+        reweighted.append(assignment_utility)
+    return reweighted
+
+
 class EV2REvaluator:
 
-    verdicts = [
-        "Supported",
-        "Refuted",
-        "Not Enough Evidence",
-        "Conflicting Evidence/Cherrypicking",
-    ]
+    verdicts = labels.VERDICTS
     # Config
     _API = properties.ModelApi.GEMINI_FLASH  # .GPT4o
     _PROMPT_TYPE = properties.PromptTypes("atomic_reference_prec_recall")
@@ -50,40 +116,99 @@ class EV2REvaluator:
     # genai.configure(api_key=os.environ["API_KEY"])
     genai.configure(api_key=GEMINI_KEY)
     GEMINI_MODEL = genai.GenerativeModel("gemini-1.5-pro", generation_config={"response_mime_type": "application/json"})
+    # Cascade: every claim is scored by the fast model first and only re-scored by GEMINI_MODEL
+    # when its recall lies within CASCADE_MARGIN of a reporting level or the response cannot be parsed.
+    GEMINI_FAST_MODEL = genai.GenerativeModel(_API.value, generation_config={"response_mime_type": "application/json"})
+    CASCADE_MARGIN = 0.05
+    # A claim with a wrong verdict scores 0 whatever its recall, so label_first skips its LLM call
+    # unless full_report asks for the recall diagnostics of every claim.
+    NOT_COMPUTED = "not computed"
+    # Reference-less mode: ATOMIC_FACTS checks the atomic facts of the claim against the predicted
+    # evidence only, so its responses are cached by the content of (claim, predicted evidence) and
+    # a QA block seen before, in this run or, with a fact cache directory, in an earlier one, is not
+    # sent to the model again.
+    SUPPORTED_PROMPT_TYPES = [properties.PromptTypes.ATOMIC_REFERENCE_FACTS_PREC_RECALL,
+                              properties.PromptTypes.ATOMIC_FACTS]
+
+    def __init__(self, cascade=False, cascade_margin=None, label_first=False, full_report=False,
+                 prompt_type=None, fact_cache_dir=None):
+        if prompt_type is not None:
+            self.prompt_type = properties.PromptTypes(prompt_type)
+        if self.prompt_type not in self.SUPPORTED_PROMPT_TYPES:
+            raise ValueError("Unsupported EV2R prompt type: {}".format(self.prompt_type.value))
+        self.cascade = cascade
+        self.label_first = label_first
+        self.full_report = full_report
+        self.not_computed_ids = []
+        self.ev2r_evi_precision = []
+        self.ev2r_evi_recall = []
+        self.ev2r_example_scores = None
+        self.cascade_margin = self.CASCADE_MARGIN if cascade_margin is None else cascade_margin
+        self.cascade_stats = {
+            "claims": 0,
+            "escalated": 0,
+            "fast_unparseable": 0,
+            "compared": 0,
+            "decision_agreement": 0,
+            "recall_abs_diff": 0.0,
+        }
+        # Time spent waiting on the model; per-claim timings are only kept when profiling
+        self.llm_wait = 0.0
+        self.llm_requests = 0
+        # Characters and tokens sent to and received from each model, for cost reports and estimate.py
+        self.usage = {}
+        self.token_counter = estimate.TokenCounter()
+        self.claim_timings = None
+        # prompts.PromptStore of the gold file, used by prepare_prompt when set
+        self.prompt_store = None
+        self.fact_cache = None
+        self.fact_cache_stored_elsewhere = 0
+        if self.is_reference_free():
+            self.fact_cache = claim_cache.ResponseCache(fact_cache_dir, self.get_cache_namespace())
+
+    def is_reference_free(self):
+        return self.prompt_type == properties.PromptTypes.ATOMIC_FACTS
 
     def prepare_dataset(self, srcs, tgts):
         srcs_data = []
         tgts_data = []
 
+        for src_entry, tgt_entry in self.iter_dataset(srcs, tgts):
+            srcs_data.append(src_entry)
+            tgts_data.append(tgt_entry)
+
+        return srcs_data, tgts_data
+
+    def iter_dataset(self, srcs, tgts, with_reference_evidence=True):
+        """prepare_dataset one (prediction, reference) pair at a time, so the evidence strings
+        of the whole submission are never in memory at once.
+
+        Without with_reference_evidence the reference entries get an empty evidence string, for
+        prompts rendered from the prompt store, which already holds the reference evidence.
+        """
         for src, tgt in zip(srcs, tgts):
-            #
-            prediction_evidence = ""
-            for src_qa in src['evidence']:
-                prediction_evidence += "Question: " + src_qa["question"] + "\n" + "Answer: " + src_qa["answer"] + "\n\n"
-            #
-            reference_evidence = ""
-            for tgt_qa in tgt['questions']:
-                reference_evidence += "Question: " + tgt_qa["question"] + "\n" + "Answer: " + tgt_qa["answers"][0]["answer"] + "\n\n"
+            prediction_evidence = prompts.predicted_evidence(src)
+            reference_evidence = prompts.reference_evidence(tgt) if with_reference_evidence else ""
 
             if 'claim_id' not in tgt.keys():
                 tgt['claim_id'] = src['claim_id']
 
-            srcs_data.append(properties.AveritecEntry(claim=src['claim'],
-                                                       label=src['pred_label'],
-                                                       evidence=prediction_evidence,
-                                                       id=src['claim_id']
-                                                       ))
-            tgts_data.append(properties.AveritecEntry(claim=tgt['claim'],
-                                                        label=tgt['label'],
-                                                        evidence=reference_evidence,
-                                                        id=tgt['claim_id']
-                                                        ))
-
-        return srcs_data, tgts_data
-
-    def query_gemini(self, prompt):
+            yield (properties.AveritecEntry(claim=src['claim'],
+                                            label=src['pred_label'],
+                                            evidence=prediction_evidence,
+                                            id=src['claim_id']
+                                            ),
+                   properties.AveritecEntry(claim=tgt['claim'],
+                                            label=tgt['label'],
+                                            evidence=reference_evidence,
+                                            id=tgt['claim_id']
+                                            ))
+
+    def query_gemini(self, prompt, model=None):
+        if model is None:
+            model = self.GEMINI_MODEL
         try:
-            return self.GEMINI_MODEL.generate_content(
+            return model.generate_content(
                         prompt,
                         generation_config=genai.types.GenerationConfig(
                             candidate_count=1,
@@ -97,6 +222,10 @@ class EV2REvaluator:
 
     def prepare_prompt(self, tgt_sample, pred_sample):
         """Formats prompt using dataset sample as input."""
+        if self.prompt_store is not None:
+            return self.prompt_store.render(tgt_sample.id, pred_sample.evidence)
+        if self.is_reference_free():
+            return properties.PROMPT_MAPPING[self.prompt_type].format(tgt_sample.claim, pred_sample.evidence)
         prompt = properties.PROMPT_MAPPING[self.prompt_type].format(tgt_sample.claim,
                                                                     tgt_sample.evidence,
                                                                     pred_sample.evidence)
@@ -118,13 +247,14 @@ class EV2REvaluator:
                                          logprobs=logprob_inp)
 
     def calculate_atomic_score_prec_recall_openai_response(self, response_llm):
-        response_openai_copy = copy.deepcopy(response_llm)
+        # Only the response dict is modified, so a shallow copy is enough
+        response_openai_copy = copy.copy(response_llm)
         try:
             if type(response_llm.response) == str:
                 response = json.loads(
                     response_llm.response.replace(": '", ": \"").replace("',", "\",").replace("':", "\":"))
             else:
-                response = response_llm.response
+                response = dict(response_llm.response)
             response_openai_copy.response = response
             response_openai_copy.response['precision'] = response["support predicted evidence"] / response[
                 "facts count predicted evidence"]
@@ -136,38 +266,262 @@ class EV2REvaluator:
 
         return response_openai_copy
 
+    def calculate_atomic_score_facts_openai_response(self, response_llm):
+        """Reference-less scores: the share of claim facts the predicted evidence supports or refutes.
+
+        Without reference evidence there is no separate precision, so both keys hold that share.
+        """
+        # Only the response dict is modified, so a shallow copy is enough
+        response_openai_copy = copy.copy(response_llm)
+        try:
+            if type(response_llm.response) == str:
+                response = json.loads(
+                    response_llm.response.replace(": '", ": \"").replace("',", "\",").replace("':", "\":"))
+            else:
+                response = dict(response_llm.response)
+            response_openai_copy.response = response
+            verified = (response["support"] + response["contradict"]) / response["facts count"]
+            response_openai_copy.response['precision'] = verified
+            response_openai_copy.response['recall'] = verified
+        except Exception as e:
+            print("Following exception occurred: {}".format(e))
+            return None
+
+        return response_openai_copy
+
+    def score_response(self, response_llm):
+        if self.is_reference_free():
+            return self.calculate_atomic_score_facts_openai_response(response_llm)
+        return self.calculate_atomic_score_prec_recall_openai_response(response_llm)
+
+    def get_cache_namespace(self):
+        return "{}_{}".format(self.prompt_type.value, "cascade" if self.cascade else "pro")
+
+    def restore_response(self, src, tgt, entry):
+        """Rebuilds a scored response from a per-claim result cache entry."""
+        return properties.OpenAIResponse(claim=tgt['claim'], evidence="",
+                                         response={'precision': entry['ev2r_precision'],
+                                                   'recall': entry['ev2r_recall']},
+                                         gold=tgt['label'].lower(), id=src['claim_id'])
+
     def calculate_prediction_scores(self, responses):
         predictions_w_scores = []
 
         for i, res in enumerate(responses):
-            pred_w_scores = self.calculate_atomic_score_prec_recall_openai_response(res)
+            pred_w_scores = self.score_response(res)
             if pred_w_scores:
                 predictions_w_scores.append(pred_w_scores)
 
         return predictions_w_scores
 
+    def query_api_model(self, tgt_sample, prompt, model=None):
+        attempt = 0
+        while attempt < self.MAX_RETRIES:
+            try:
+                request_start = time.perf_counter()
+                response = self.query_gemini(prompt, model)
+                self.llm_wait += time.perf_counter() - request_start
+                break
+            except:
+                attempt += 1
+                wait_time = 10 ** attempt  # Exponential backoff
+                print(f"Request timed out. Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+        else:
+            return None
+
+        # Bookkeeping stays out of the retry loop: an error here must not send the request again
+        output = self.process_output(tgt_sample, response)
+        # query_gemini returns "" when the request failed; only answered requests are counted
+        if not (isinstance(response, str) and not response):
+            self.llm_requests += 1
+            self.record_usage(model or self.GEMINI_MODEL, prompt, response, output)
+            print("One request successfully processed..")
+        return output
+
+    def record_usage(self, model, prompt, response, output):
+        usage = self.usage.setdefault(estimate.model_name(model), {
+            "requests": 0, "input_chars": 0, "input_tokens": 0, "output_tokens": 0, "api_token_counts": 0})
+        text = output.response if isinstance(output.response, str) else ""
+        metadata = getattr(response, "usage_metadata", None)
+        usage["requests"] += 1
+        usage["input_chars"] += len(prompt)
+        if metadata is not None and metadata.prompt_token_count:
+            usage["input_tokens"] += metadata.prompt_token_count
+            usage["output_tokens"] += metadata.candidates_token_count
+            usage["api_token_counts"] += 1
+        else:
+            usage["input_tokens"] += self.token_counter.count(prompt)
+            usage["output_tokens"] += self.token_counter.count(text)
+
+    def get_counters(self):
+        """Request, usage, cascade and fact cache counters, which shard workers send to the coordinator."""
+        return {
+            "llm_requests": self.llm_requests,
+            "llm_wait": self.llm_wait,
+            "usage": self.usage,
+            "cascade_stats": self.cascade_stats,
+            "fact_cache": None if self.fact_cache is None else {"hits": self.fact_cache.hits,
+                                                                 "misses": self.fact_cache.misses,
+                                                                 "stored": len(self.fact_cache.responses)},
+        }
+
+    def add_counters(self, counters):
+        """Adds the counters of another scorer (a shard worker) to those of this one."""
+        self.llm_requests += counters["llm_requests"]
+        self.llm_wait += counters["llm_wait"]
+        for model, usage in counters["usage"].items():
+            total = self.usage.setdefault(model, dict.fromkeys(usage, 0))
+            for key, value in usage.items():
+                total[key] = total.get(key, 0) + value
+        for key, value in counters["cascade_stats"].items():
+            self.cascade_stats[key] += value
+        if self.fact_cache is not None and counters["fact_cache"] is not None:
+            self.fact_cache.hits += counters["fact_cache"]["hits"]
+            self.fact_cache.misses += counters["fact_cache"]["misses"]
+            if self.fact_cache.path is None:
+                # Without a cache directory the responses stayed in the memory of that scorer
+                self.fact_cache_stored_elsewhere += counters["fact_cache"]["stored"]
+
+    def get_usage_report(self):
+        report = {
+            "prompt_type": self.prompt_type.value,
+            "llm_requests": self.llm_requests,
+            "llm_wait": self.llm_wait,
+            "models": self.usage,
+        }
+        if self.cascade:
+            report["ev2r_cascade"] = self.get_cascade_report()
+        return report
+
+    def is_uncertain(self, scored_response):
+        if scored_response is None:
+            return True
+        recall = scored_response.response['recall']
+        return any(abs(recall - level) <= self.cascade_margin for level in self.ev2r_reporting_levels)
+
+    def query_cascade(self, tgt_sample, prompt):
+        """Scores with the fast model and escalates uncertain claims to GEMINI_MODEL."""
+        self.cascade_stats["claims"] += 1
+        fast_response = self.query_api_model(tgt_sample, prompt, self.GEMINI_FAST_MODEL)
+        fast_scored = None
+        if fast_response is not None:
+            fast_scored = self.score_response(fast_response)
+        if fast_scored is None:
+            self.cascade_stats["fast_unparseable"] += 1
+        if not self.is_uncertain(fast_scored):
+            return fast_response
+
+        self.cascade_stats["escalated"] += 1
+        response = self.query_api_model(tgt_sample, prompt, self.GEMINI_MODEL)
+        scored = None
+        if response is not None:
+            scored = self.score_response(response)
+        if fast_scored is not None and scored is not None:
+            fast_recall, recall = fast_scored.response['recall'], scored.response['recall']
+            self.cascade_stats["compared"] += 1
+            self.cascade_stats["recall_abs_diff"] += abs(fast_recall - recall)
+            if all((fast_recall > level) == (recall > level) for level in self.ev2r_reporting_levels):
+                self.cascade_stats["decision_agreement"] += 1
+        return response
+
+    def query_fact_cache(self, tgt_sample, pred_sample, prompt):
+        """Reference-less query that reuses the response for an already scored (claim, evidence)."""
+        key = claim_cache.content_hash(tgt_sample.claim, pred_sample.evidence)
+        cached = self.fact_cache.get(key)
+        if cached is not None:
+            return properties.OpenAIResponse(claim=tgt_sample.claim, evidence=tgt_sample.evidence,
+                                             response=cached, gold=tgt_sample.label.lower(),
+                                             id=tgt_sample.id)
+        if self.cascade:
+            response = self.query_cascade(tgt_sample, prompt)
+        else:
+            response = self.query_api_model(tgt_sample, prompt)
+        # Only parseable responses are kept, so a failed request is retried next time
+        if response is not None and self.score_response(response) is not None:
+            self.fact_cache.put(key, response.response)
+        return response
+
+    def get_fact_cache_report(self):
+        return {
+            "hits": self.fact_cache.hits,
+            "misses": self.fact_cache.misses,
+            "stored": len(self.fact_cache.responses) + self.fact_cache_stored_elsewhere,
+        }
+
+    def get_cascade_report(self):
+        stats = self.cascade_stats
+        compared = max(stats["compared"], 1)
+        return {
+            "claims": stats["claims"],
+            "escalated": stats["escalated"],
+            "escalation_rate": stats["escalated"] / max(stats["claims"], 1),
+            "fast_unparseable": stats["fast_unparseable"],
+            "margin": self.cascade_margin,
+            "compared": stats["compared"],
+            "decision_agreement": stats["decision_agreement"] / compared,
+            "mean_recall_abs_diff": stats["recall_abs_diff"] / compared,
+        }
+
     def prompt_api_model(self, srcs, tgts):
-        responses = []
+        return list(self.iter_api_responses(zip(srcs, tgts)))
 
-        for i, tgt_sample in tqdm.tqdm(enumerate(tgts), desc="feed the prompt_atomic_reference_p_r to api model ..."):
-            pred_sample = srcs[i]
+    def score_api_model(self, pairs, response_log=None, budget=None):
+        """Queries and scores (prediction, reference) pairs one at a time.
+
+        Only a compact response with the precision and recall of each claim is kept; the raw
+        responses are written to `response_log` (a memory.ResponseLog) when given, so memory
+        does not grow with the evidence length. `budget` (a memory.MemoryBudget) is checked
+        after every claim.
+        """
+        scores = []
+        for response in self.iter_api_responses(pairs):
+            if budget is not None:
+                budget.check()
+            scored = self.score_response(response)
+            if response_log is not None:
+                response_log.write(response, scored)
+            if scored is not None:
+                scores.append(properties.OpenAIResponse(claim="", evidence="",
+                                                        response={'precision': scored.response['precision'],
+                                                                  'recall': scored.response['recall']},
+                                                        gold=scored.gold, id=scored.id))
+        return scores
+
+    def iter_api_responses(self, pairs):
+        for pred_sample, tgt_sample in tqdm.tqdm(pairs, desc="feed the prompt_atomic_reference_p_r to api model ..."):
+            if self.label_first and not self.full_report and not labels.same_label(pred_sample.label, tgt_sample.label):
+                self.not_computed_ids.append(tgt_sample.id)
+                continue
+            claim_start = (time.perf_counter(), time.thread_time(), self.llm_wait, self.llm_requests)
             #
             prompt = self.prepare_prompt(tgt_sample, pred_sample)
             #
-            attempt = 0
-            while attempt < self.MAX_RETRIES:
-                try:
-                    response = self.query_gemini(prompt)
-                    responses.append(self.process_output(tgt_sample, response))
-                    print("One request successfully processed..")
-                    break
-                except:
-                    attempt += 1
-                    wait_time = 10 ** attempt  # Exponential backoff
-                    print(f"Request timed out. Retrying in {wait_time} seconds...")
-                    time.sleep(wait_time)
-
-        return responses
+            if self.fact_cache is not None:
+                response = self.query_fact_cache(tgt_sample, pred_sample, prompt)
+            elif self.cascade:
+                response = self.query_cascade(tgt_sample, prompt)
+            else:
+                response = self.query_api_model(tgt_sample, prompt)
+            if self.claim_timings is not None:
+                self.record_claim_timing(tgt_sample.id, claim_start)
+            if response is not None:
+                yield response
+
+    def record_claim_timing(self, claim_id, claim_start):
+        wall_start, cpu_start, llm_wait_start, llm_requests_start = claim_start
+        wall_time = time.perf_counter() - wall_start
+        llm_wait = self.llm_wait - llm_wait_start
+        cpu_time = time.thread_time() - cpu_start
+        self.claim_timings.append({
+            "claim_id": claim_id,
+            "llm_requests": self.llm_requests - llm_requests_start,
+            "llm_wait": llm_wait,
+            "cpu_time": cpu_time,
+            # Retry backoff and anything else spent neither in the model nor on the CPU
+            "other_wait": max(wall_time - llm_wait - cpu_time, 0.0),
+            "wall_time": wall_time,
+        })
 
 
     def evaluate_ev2r_score_ori(self, srcs, tgts, ev2r_scores):
@@ -188,72 +542,99 @@ class EV2REvaluator:
         return np.mean(np.array(scores), axis=0)
 
     def evaluate_ev2r_score(self, srcs, tgts, ev2r_scores):
-        scores = []
+        """Per-claim scores: the verdict agreement where the recall is above a reporting level.
+
+        ev2r_scores are matched to claims by id, the claim_id of the aligned prediction; claims
+        without one get a recall of 0, or NOT_COMPUTED when label_first skipped them.
+        """
+        not_computed_ids = set(self.not_computed_ids)
+        scores_by_id = {}
+        for ev2r_score in ev2r_scores:
+            scores_by_id.setdefault(ev2r_score.id, ev2r_score)
+
+        ev2r_evi_precision = []
         ev2r_evi_recall = []
-        veracity_scores = []
+        recalls = np.full(len(srcs), -np.inf)
+        for i, src in enumerate(srcs):
+            ev2r_score = scores_by_id.get(src["claim_id"])
+            if ev2r_score is None:
+                missing = self.NOT_COMPUTED if src["claim_id"] in not_computed_ids else 0.0
+                ev2r_evi_precision.append(missing)
+                ev2r_evi_recall.append(missing)
+            else:
+                precision, recall = ev2r_score.response['precision'], ev2r_score.response['recall']
+                ev2r_evi_precision.append(precision)
+                ev2r_evi_recall.append(recall)
+                recalls[i] = recall
 
-        for i, (src, tgt) in enumerate(tqdm.tqdm(zip(srcs, tgts))):
-            #
-            this_example_scores = [0.0 for _ in self.ev2r_reporting_levels]
-            for ev2r_score in ev2r_scores:
-                if ev2r_score.id == i:
-                    precision, recall = ev2r_score.response['precision'], ev2r_score.response['recall']
-                    #
-                    for j, level in enumerate(self.ev2r_reporting_levels):
-                        if recall > level:
-                            this_example_scores[j] = src["pred_label"] == tgt["label"]
-
-                    scores.append(this_example_scores)
-                    ev2r_evi_recall.append(recall)
-                    veracity_scores.append(1.0 if src["pred_label"] == tgt["label"] else 0.0)
-                    break
-                if ev2r_score.id > i:
-                    break
-
-            if len(scores) != (i+1):
-                scores.append(this_example_scores)
-                ev2r_evi_recall.append(0.0)
+        label_match = labels.label_agreement(srcs, tgts)
+        levels = np.array(self.ev2r_reporting_levels, dtype=float)
+        scores = ((recalls[:, None] > levels[None, :]) & label_match[:, None]).astype(float)
 
-        return np.mean(np.array(scores), axis=0)
+        self.ev2r_evi_precision = ev2r_evi_precision
+        self.ev2r_evi_recall = ev2r_evi_recall
+        self.ev2r_example_scores = scores
+        return np.mean(scores, axis=0)
 
 
 class AVeriTeCEvaluator:
 
-    verdicts = [
-        "Supported",
-        "Refuted",
-        "Not Enough Evidence",
-        "Conflicting Evidence/Cherrypicking",
-    ]
+    verdicts = labels.VERDICTS
     pairwise_metric = None
     max_questions = 10
     metric = None
     # averitec_reporting_levels = [0.1, 0.2, 0.25, 0.3, 0.4, 0.5]
     averitec_reporting_levels = [0.25]
 
-    def __init__(self, metric="meteor"):
+    def __init__(self, metric=METEOR_METRIC, **metric_options):
+        if metric not in PAIRWISE_METRICS:
+            raise ValueError("Unknown pairwise metric {!r}, expected one of {}".format(
+                metric, sorted(PAIRWISE_METRICS)))
         self.metric = metric
-        if metric == "meteor":
-            self.pairwise_metric = pairwise_meteor
+        self.pairwise_metric = PAIRWISE_METRICS[metric](**metric_options)
+        self.question_utilities = None
+        self.evidence_utilities = None
+        self.averitec_example_scores = None
 
-    def evaluate_averitec_score(self, srcs, tgts):
-        scores = []
-        for src, tgt in tqdm.tqdm(zip(srcs, tgts)):
-            score = self.compute_pairwise_evidence_score(src, tgt)
+    def evaluate_averitec_score(self, srcs, tgts, evidence_utilities=None):
+        """evidence_utilities can be passed from evaluate_questions_and_answers to avoid re-scoring."""
+        if evidence_utilities is None:
+            evidence_utilities = self.compute_evidence_utilities(srcs, tgts)
 
-            this_example_scores = [0.0 for _ in self.averitec_reporting_levels]
-            for i, level in enumerate(self.averitec_reporting_levels):
-                if score > level:
-                    this_example_scores[i] = src["pred_label"] == tgt["label"]
+        utilities = np.array(evidence_utilities, dtype=float).reshape(-1)
+        levels = np.array(self.averitec_reporting_levels, dtype=float)
+        label_match = labels.label_agreement(srcs, tgts)
+        scores = ((utilities[:, None] > levels[None, :]) & label_match[:, None]).astype(float)
 
-            scores.append(this_example_scores)
-
-        return np.mean(np.array(scores), axis=0)
+        self.averitec_example_scores = scores
+        return np.mean(scores, axis=0)
 
 
     def evaluate_questions_only(self, srcs, tgts):
-        all_utils = []
-        for src, tgt in tqdm.tqdm(zip(srcs, tgts)):
+        self.question_utilities = self.compute_question_utilities(srcs, tgts)
+        return np.mean(self.question_utilities)
+
+    def compute_assignment_utilities(self, string_pairs):
+        """Utilities of (src_strings, tgt_strings) pairs, reweighted for unmatched target strings."""
+        if hasattr(self.pairwise_metric, "encode"):
+            # Encode every distinct string once, in batches
+            self.pairwise_metric.encode([string for src_strings, tgt_strings in string_pairs
+                                         for string in src_strings + tgt_strings])
+
+        all_scores = []
+        reweight_terms = []
+        for src_strings, tgt_strings in tqdm.tqdm(string_pairs):
+            all_scores.append(compute_all_pairwise_scores(
+                src_strings, tgt_strings, self.pairwise_metric
+            ))
+            # Reweight to account for unmatched target questions
+            reweight_terms.append(1 / float(len(tgt_strings)))
+
+        return reweight_utilities(assignment.batch_assignment_utilities(all_scores), reweight_terms)
+
+    def compute_question_utilities(self, srcs, tgts):
+        string_pairs = []
+        for src, tgt in zip(srcs, tgts):
             if "evidence" not in src:
                 # If there was no evidence, use the string evidence
                 src_questions = self.extract_full_comparison_strings(
@@ -264,24 +645,9 @@ class AVeriTeCEvaluator:
                     qa["question"] for qa in src["evidence"][: self.max_questions]
                 ]
             tgt_questions = [qa["question"] for qa in tgt["questions"]]
+            string_pairs.append((src_questions, tgt_questions))
 
-            pairwise_scores = compute_all_pairwise_scores(
-                src_questions, tgt_questions, self.pairwise_metric
-            )
-
-            assignment = scipy.optimize.linear_sum_assignment(
-                pairwise_scores, maximize=True
-            )
-
-            assignment_utility = pairwise_scores[assignment[0], assignment[1]].sum()
-
-            # Reweight to account for unmatched target questions
-            reweight_term = 1 / float(len(tgt_questions))
-            assignment_utility *= reweight_term
-
-            all_utils.append(assignment_utility)
-
-        return np.mean(all_utils)
+        return self.compute_assignment_utilities(string_pairs)
 
 
     def compute_pairwise_evidence_score(self, src, tgt):
@@ -318,10 +684,7 @@ class AVeriTeCEvaluator:
         pairwise_scores = compute_all_pairwise_scores(
             src_strings, tgt_strings, self.pairwise_metric
         )
-        assignment = scipy.optimize.linear_sum_assignment(
-            pairwise_scores, maximize=True
-        )
-        assignment_utility = pairwise_scores[assignment[0], assignment[1]].sum()
+        assignment_utility = assignment.assignment_utility(pairwise_scores)
 
         # Reweight to account for unmatched target questions
         reweight_term = 1 / float(len(tgt_strings))
@@ -330,30 +693,19 @@ class AVeriTeCEvaluator:
 
 
     def evaluate_questions_and_answers(self, srcs, tgts):
-        all_utils = []
-        for src, tgt in tqdm.tqdm(zip(srcs, tgts)):
+        self.evidence_utilities = self.compute_evidence_utilities(srcs, tgts)
+        return np.mean(self.evidence_utilities)
+
+    def compute_evidence_utilities(self, srcs, tgts):
+        string_pairs = []
+        for src, tgt in zip(srcs, tgts):
             src_strings = self.extract_full_comparison_strings(src, is_target=False)[
                 : self.max_questions
             ]
             tgt_strings = self.extract_full_comparison_strings(tgt)
+            string_pairs.append((src_strings, tgt_strings))
 
-            pairwise_scores = compute_all_pairwise_scores(
-                src_strings, tgt_strings, self.pairwise_metric
-            )
-
-            assignment = scipy.optimize.linear_sum_assignment(
-                pairwise_scores, maximize=True
-            )
-
-            assignment_utility = pairwise_scores[assignment[0], assignment[1]].sum()
-
-            # Reweight to account for unmatched target questions
-            reweight_term = 1 / float(len(tgt_strings))
-            assignment_utility *= reweight_term
-
-            all_utils.append(assignment_utility)
-
-        return np.mean(all_utils)
+        return self.compute_assignment_utilities(string_pairs)
 
     def extract_full_comparison_strings(self, example, is_target=True):
         example_strings = []
@@ -391,6 +743,41 @@ class AVeriTeCEvaluator:
         return example_strings
 
 
+def compute_missing_values(cached, key, compute, srcs, tgts):
+    """Per-claim values of `key`, calling `compute` only on the claims without a cached value."""
+    values = [entry.get(key) for entry in cached]
+    todo = [i for i, value in enumerate(values) if value is None]
+    if todo:
+        for i, value in zip(todo, compute([srcs[i] for i in todo], [tgts[i] for i in todo])):
+            values[i] = value
+
+    return values, todo
+
+
+# Parsed gold files, kept for the lifetime of the process (see service.py)
+_REFERENCES = {}
+_REFERENCES_LOCK = threading.Lock()
+
+
+def load_references(test_annotation_file):
+    """Gold annotations, parsed once per process and reloaded only when the file changes."""
+    path = os.path.abspath(test_annotation_file)
+    stat = os.stat(path)
+    with _REFERENCES_LOCK:
+        entry = _REFERENCES.get(path)
+        if entry is None or entry[0] != (stat.st_mtime_ns, stat.st_size):
+            with open(path) as f:
+                entry = ((stat.st_mtime_ns, stat.st_size), json.load(f))
+            _REFERENCES[path] = entry
+    # Scoring adds keys to gold entries, so every evaluation gets its own shallow copies
+    return [dict(tgt) for tgt in entry[1]]
+
+
+def loaded_reference_files():
+    with _REFERENCES_LOCK:
+        return sorted(_REFERENCES)
+
+
 def evaluate(test_annotation_file, user_submission_file, phase_codename, **kwargs):
     print("Starting Evaluation.....")
     print("Submission related metadata:")
@@ -429,33 +816,289 @@ def evaluate(test_annotation_file, user_submission_file, phase_codename, **kwarg
             "id": 123,
             "submitted_at": u"2017-03-20T19:22:03.880652Z",
         }
+
+        Evaluation options can also be passed as keyword arguments:
+            `ev2r_cascade`: score with the fast model first and escalate uncertain claims
+            `ev2r_cascade_margin`: distance to a reporting level that counts as uncertain
+            `ev2r_label_first`: skip the LLM call for claims whose predicted label is wrong
+            `ev2r_full_report`: still compute the recall of those claims for reporting
+            `ev2r_prompt_type`: "atomic" for the reference-less mode, which scores the share of
+                claim facts checked by the predicted evidence without looking at the gold evidence
+            `fact_cache_dir`: directory where the reference-less responses are kept per
+                (claim, predicted evidence) content hash and reused across runs
+            `averitec_scores`: also compute the METEOR-based Q, QA and AVeriTeC scores
+            `averitec_metric`: pairwise metric used for them instead of "meteor", one of
+                PAIRWISE_METRICS (e.g. "embedding", with `averitec_metric_options`
+                {"model_path": ...} pointing to a local sentence-transformers model)
+            `trained_scorer_path`: local fine-tuned verdict classifier used as an offline,
+                EV2R-like scorer (`trained_scorer_options`: prompt_type, batch_size,
+                num_threads, onnx_path, ...)
+            `per_claim_file`: jsonl path where the raw per-claim scores are stored; other
+                thresholds can then be explored with `sweep.sweep_scores` without re-scoring
+            `bootstrap_resamples`: number of resamples for bootstrap confidence intervals
+            `compare_per_claim_file`: per-claim scores of another submission on the same gold
+                file, tested against this one with a paired bootstrap
+            `result_cache_dir`: directory of per-claim results from earlier evaluations; only
+                claims whose claim_id, claim, pred_label, evidence or string_evidence changed are
+                scored again
+            `evaluation_service_url`: URL of a running evaluation service (default: the
+                EVALUATION_SERVICE_URL environment variable) that scores the submission instead
+                of this process, see service.py
+            `shards`: split the claims into this many ranges scored by separate worker
+                processes or hosts (`shard_workers`, `shard_queue_dir`, `shard_timeout`); the
+                usage, cascade and fact cache reports, response log and profiles cover the
+                workers, see sharding.py
+            `max_claims`: number of gold claims scored (default MAX_CLAIMS, None for all)
+            `stage_timings`: report the wall and CPU time of each evaluation stage
+            `ev2r_response_log`: jsonl path where the raw EV2R responses are written; only the
+                per-claim precision and recall are kept in memory either way
+            `memory_budget_mb`: fail the run with a MemoryError once the resident set size of
+                the process is over this many MB, checked while the EV2R requests are sent
+            `prompt_store_dir`: directory where the gold-dependent part of every EV2R prompt is
+                stored once per gold file and memory-mapped by later runs, see prompts.py
+            `run_metrics_file`: jsonl path where the requests, tokens, LLM wait and peak RSS of
+                every run are appended
+            `dry_run`: only estimate the requests, tokens, cost and duration of the run, using
+                the history in `run_metrics_file` (`dry_run_tokenizer`, `dry_run_concurrency`,
+                `dry_run_requests_per_minute`, `dry_run_prices`), see estimate.py
+            `profile`: directory where a sampling profile (flamegraph and speedscope files) and a
+                per-claim table of LLM wait and CPU time are written, or True for the directory
+                of the submission file; the EVALUATION_PROFILE environment variable does the
+                same (`profile_interval`: seconds between samples), see profiling.py
     """
     print(kwargs["submission_metadata"])
 
+    if kwargs.get("dry_run"):
+        return estimate.dry_run(test_annotation_file, user_submission_file, phase_codename, **kwargs)
+    service_url = kwargs.pop("evaluation_service_url", None) or os.environ.get(service.SERVICE_URL_ENV)
+    if service_url:
+        print("Forwarding the submission to the evaluation service at {}".format(service_url))
+        return service.evaluate_remote(service_url, test_annotation_file, user_submission_file,
+                                       phase_codename, **kwargs)
+    if kwargs.get("shards"):
+        return sharding.evaluate_sharded(test_annotation_file, user_submission_file, phase_codename, **kwargs)
+    return evaluate_local(test_annotation_file, user_submission_file, phase_codename, **kwargs)
+
+
+# Number of gold claims scored by evaluate(); max_claims=None scores all of them
+MAX_CLAIMS = 2
+
+
+def load_claims(test_annotation_file, user_submission_file, claim_range=None, max_claims=MAX_CLAIMS):
+    """The predictions, aligned to the gold claims, and the gold claims that evaluate() scores."""
     with open(user_submission_file) as f:
-        predictions = json.load(f)[:2]
+        predictions = json.load(f)
+
+    references = load_references(test_annotation_file)
 
-    with open(test_annotation_file) as f:
-        references = json.load(f)[:2]
+    # Fail before any scoring if the submission is malformed; predictions are aligned to the gold order
+    predictions = validation.validate_submission(predictions, references, EV2REvaluator.verdicts)
+    predictions, references = predictions[:max_claims], references[:max_claims]
+    if claim_range is not None:
+        start, end = claim_range
+        predictions, references = predictions[start:end], references[start:end]
+    return predictions, references
+
+
+def build_ev2r_scorer(kwargs):
+    return EV2REvaluator(cascade=kwargs.get("ev2r_cascade", False),
+                         cascade_margin=kwargs.get("ev2r_cascade_margin"),
+                         label_first=kwargs.get("ev2r_label_first", False),
+                         full_report=kwargs.get("ev2r_full_report", False),
+                         prompt_type=kwargs.get("ev2r_prompt_type"),
+                         fact_cache_dir=kwargs.get("fact_cache_dir"))
+
+
+def evaluate_local(test_annotation_file, user_submission_file, phase_codename, **kwargs):
+    """evaluate() in this process; the evaluation service and shard workers call it directly.
+
+    Shard workers pass `claim_range` (start, end) and `score_only`, which stops once the
+    per-claim scores of that range are stored in `result_cache_dir` and returns them with the
+    scorer counters; the coordinator passes those back as `ev2r_counters`. The
+    service passes `profile_name`, the job id, which goes into the profile file names.
+    """
+    directory = profiling.profile_dir(kwargs.get("profile"), user_submission_file)
+    if directory is None:
+        return score_submission(test_annotation_file, user_submission_file, phase_codename, None, **kwargs)
+
+    claim_timings = []
+    with profiling.SamplingProfiler(kwargs.get("profile_interval", profiling.DEFAULT_INTERVAL)) as profiler:
+        output = score_submission(test_annotation_file, user_submission_file, phase_codename, claim_timings,
+                                  **kwargs)
+    report = profiling.write_profile(profiler, claim_timings, directory, kwargs.get("profile_name"))
+    print("Profile written to {}: {}".format(directory, report))
+    if isinstance(output, dict):
+        output.setdefault("submission_metadata", {})["profile"] = report
+    return output
+
+
+def load_comparison_records(predictions, kwargs):
+    """The per-claim records of `compare_per_claim_file`, checked against the predictions before
+    any scoring, or None without a paired bootstrap."""
+    if not (kwargs.get("bootstrap_resamples") and kwargs.get("compare_per_claim_file")):
+        return None
+    records = sweep.load_per_claim_records(kwargs["compare_per_claim_file"])
+    bootstrap.check_alignment([src.get("claim_id", i) for i, src in enumerate(predictions)], records,
+                              kwargs["compare_per_claim_file"])
+    return records
+
+
+def score_submission(test_annotation_file, user_submission_file, phase_codename, claim_timings, **kwargs):
+    """The body of evaluate_local; per-claim EV2R timings are appended to `claim_timings` unless None."""
+    timer = timings.StageTimer()
+    predictions, references = load_claims(test_annotation_file, user_submission_file, kwargs.get("claim_range"),
+                                          kwargs.get("max_claims", MAX_CLAIMS))
+    comparison_records = load_comparison_records(predictions, kwargs)
+    timer.lap("load_claims")
+
+    EV2R_scorer = build_ev2r_scorer(kwargs)
+    EV2R_scorer.claim_timings = claim_timings
+    # Counters of the shard workers, so that the reports cover the claims they scored
+    for counters in kwargs.get("ev2r_counters", []):
+        EV2R_scorer.add_counters(counters)
+    submission_metadata = {}
+
+    # Per-claim results of earlier submissions against the same gold file
+    cache = None
+    cached = [{} for _ in predictions]
+    if kwargs.get("result_cache_dir"):
+        cache = claim_cache.ClaimResultCache(kwargs["result_cache_dir"], test_annotation_file,
+                                             EV2R_scorer.get_cache_namespace())
+        cached = [cache.get(src, i) for i, src in enumerate(predictions)]
+        timer.lap("result_cache")
 
     # AVeriTeC scorer
-    # scorer = AVeriTeCEvaluator()
-    # Q_evidence_score = scorer.evaluate_questions_only(predictions, references)
-    # QA_evidence_score = scorer.evaluate_questions_and_answers(predictions, references)
-    # averitec_scores = scorer.evaluate_averitec_score(predictions, references)
+    averitec_metric = kwargs.get("averitec_metric", METEOR_METRIC)
+    averitec_metric_options = kwargs.get("averitec_metric_options", {})
+    scorer = AVeriTeCEvaluator(averitec_metric, **averitec_metric_options)
+    averitec_output = {}
+    if kwargs.get("averitec_scores", False):
+        prefix = utility_cache_prefix(averitec_metric, averitec_metric_options)
+        q_key, qa_key = prefix + "_q_utility", prefix + "_qa_utility"
+        scorer.question_utilities, q_todo = compute_missing_values(
+            cached, q_key, scorer.compute_question_utilities, predictions, references)
+        scorer.evidence_utilities, qa_todo = compute_missing_values(
+            cached, qa_key, scorer.compute_evidence_utilities, predictions, references)
+        averitec_scores = scorer.evaluate_averitec_score(predictions, references, scorer.evidence_utilities)
+        averitec_output = {
+            "Q Score": np.mean(scorer.question_utilities),
+            "QA Score": np.mean(scorer.evidence_utilities),
+            "AVeriTeC Score": averitec_scores[0],  # (meteor @ 0.25)
+        }
+        if cache:
+            for i in sorted(set(q_todo) | set(qa_todo)):
+                cache.update(predictions[i], i, **{q_key: scorer.question_utilities[i],
+                                                   qa_key: scorer.evidence_utilities[i]})
+        timer.lap("averitec")
 
     # EV2R scorer
-    EV2R_scorer = EV2REvaluator()
-    #
     start_time = time.time()
-    pred_data, ref_data = EV2R_scorer.prepare_dataset(predictions, references)
-    responses = EV2R_scorer.prompt_api_model(pred_data, ref_data)
-    ev2r_scores = EV2R_scorer.calculate_prediction_scores(responses)
+    ev2r_todo = [i for i, entry in enumerate(cached) if entry.get("ev2r_recall") is None]
+    response_log = memory.ResponseLog(kwargs["ev2r_response_log"]) if kwargs.get("ev2r_response_log") else None
+    budget = memory.MemoryBudget(kwargs.get("memory_budget_mb"))
+    EV2R_scorer.prompt_store = prompts.get_prompt_store(test_annotation_file, EV2R_scorer.prompt_type,
+                                                        kwargs.get("prompt_store_dir"))
+    pairs = EV2R_scorer.iter_dataset([predictions[i] for i in ev2r_todo], [references[i] for i in ev2r_todo],
+                                     with_reference_evidence=False)
+    try:
+        ev2r_scores = EV2R_scorer.score_api_model(pairs, response_log, budget)
+    finally:
+        if response_log is not None:
+            response_log.close()
+    timer.lap("ev2r_requests")
+    if EV2R_scorer.llm_requests:
+        submission_metadata["ev2r_usage"] = EV2R_scorer.get_usage_report()
+        if kwargs.get("run_metrics_file"):
+            estimate.append_run_metrics(kwargs["run_metrics_file"],
+                                        dict(submission_metadata["ev2r_usage"], peak_rss_mb=memory.peak_rss_mb()))
+    if cache:
+        computed = {score.id: score.response for score in ev2r_scores}
+        for i in ev2r_todo:
+            response = computed.get(predictions[i]["claim_id"])
+            if response:
+                cache.update(predictions[i], i, ev2r_precision=response["precision"],
+                             ev2r_recall=response["recall"])
+        ev2r_scores = sorted(ev2r_scores + [EV2R_scorer.restore_response(predictions[i], references[i], entry)
+                                            for i, entry in enumerate(cached)
+                                            if entry.get("ev2r_recall") is not None],
+                             key=lambda score: score.id)
+        submission_metadata["result_cache"] = {
+            "claims": len(predictions),
+            "ev2r_scored": len(ev2r_todo),
+            "ev2r_reused": len(predictions) - len(ev2r_todo),
+        }
+        print("Result cache: {}".format(submission_metadata["result_cache"]))
+        if kwargs.get("score_only"):
+            return {"values": [cache.get(src, i) for i, src in enumerate(predictions)],
+                    "counters": EV2R_scorer.get_counters()}
 
     averitec_ev2r_scores = EV2R_scorer.evaluate_ev2r_score(predictions, references, ev2r_scores)
+    timer.lap("ev2r_aggregate")
     print("EV2R time: {}".format(time.time() - start_time))
 
+    # Offline verdict-classifier scorer
+    trained_scores = None
+    if kwargs.get("trained_scorer_path"):
+        start_time = time.time()
+        trained = trained_scorer.TrainedScorer(kwargs["trained_scorer_path"],
+                                               **kwargs.get("trained_scorer_options", {}))
+        pred_data, ref_data = EV2R_scorer.prepare_dataset(predictions, references)
+        trained_scores = trained.score(pred_data, ref_data)
+        submission_metadata["trained_scorer"] = {
+            "prompt_type": trained.prompt_type.value,
+            "Trained Score": trained.evaluate_trained_score(predictions, references, trained_scores)[0],
+            "mean_gold_label_probability": float(np.mean(trained_scores)),
+        }
+        print("Trained scorer time: {}".format(time.time() - start_time))
+        timer.lap("trained_scorer")
+
     output = {}
+    if EV2R_scorer.fact_cache is not None:
+        submission_metadata["fact_cache"] = EV2R_scorer.get_fact_cache_report()
+        print("Fact cache: {}".format(submission_metadata["fact_cache"]))
+    if EV2R_scorer.cascade:
+        submission_metadata["ev2r_cascade"] = EV2R_scorer.get_cascade_report()
+        print("EV2R cascade: {}".format(submission_metadata["ev2r_cascade"]))
+    if averitec_output:
+        submission_metadata["averitec"] = averitec_output
+
+    records = sweep.build_per_claim_records(
+        predictions, references,
+        ev2r_precision=EV2R_scorer.ev2r_evi_precision,
+        ev2r_recall=EV2R_scorer.ev2r_evi_recall,
+        q_utilities=scorer.question_utilities,
+        qa_utilities=scorer.evidence_utilities,
+        ev2r_scores=EV2R_scorer.ev2r_example_scores[:, 0],
+        averitec_scores=None if scorer.averitec_example_scores is None else scorer.averitec_example_scores[:, 0])
+    per_claim_file = kwargs.get("per_claim_file")
+    if per_claim_file:
+        sweep.save_per_claim_records(per_claim_file, records)
+        print("Per-claim scores saved to {}".format(per_claim_file))
+    timer.lap("per_claim_records")
+
+    bootstrap_resamples = kwargs.get("bootstrap_resamples", 0)
+    if bootstrap_resamples:
+        names, score_matrix = bootstrap.score_matrix_from_records(records)
+        submission_metadata["bootstrap"] = bootstrap.bootstrap_confidence_intervals(
+            score_matrix, names, n_resamples=bootstrap_resamples)
+        print("Bootstrap confidence intervals: {}".format(submission_metadata["bootstrap"]))
+
+        compare_per_claim_file = kwargs.get("compare_per_claim_file")
+        if compare_per_claim_file:
+            records_a, records_b = bootstrap.align_records(records, comparison_records)
+            names, score_matrix_a = bootstrap.score_matrix_from_records(records_a)
+            names_b, score_matrix_b = bootstrap.score_matrix_from_records(records_b)
+            shared = [j for j, name in enumerate(names) if name in names_b]
+            score_matrix_b = score_matrix_b[:, [names_b.index(names[j]) for j in shared]]
+            submission_metadata["paired_bootstrap"] = bootstrap.paired_bootstrap_test(
+                score_matrix_a[:, shared], score_matrix_b, [names[j] for j in shared],
+                n_resamples=bootstrap_resamples)
+            print("Paired bootstrap against {}: {}".format(compare_per_claim_file,
+                                                           submission_metadata["paired_bootstrap"]))
+        timer.lap("bootstrap")
+    if EV2R_scorer.not_computed_ids:
+        submission_metadata["ev2r_recall_not_computed"] = EV2R_scorer.not_computed_ids
+        print("EV2R requests skipped for label mismatches: {}".format(len(EV2R_scorer.not_computed_ids)))
 
     if phase_codename == "dev":
         print("Evaluating for Dev Phase")
@@ -482,6 +1125,15 @@ def evaluate(test_annotation_file, user_submission_file, phase_codename, **kwarg
         output["submission_result"] = output["result"][0]["test_split"]
         print("Completed evaluation for Test Phase")
 
+    submission_metadata["memory"] = memory.memory_report(response_log, budget)
+    print("Memory: {}".format(submission_metadata["memory"]))
+    if kwargs.get("stage_timings"):
+        submission_metadata["stage_timings"] = timer.report()
+        print("Stage timings: {}".format(submission_metadata["stage_timings"]))
+
+    if submission_metadata:
+        output["submission_metadata"] = submission_metadata
+
     return output
 
 
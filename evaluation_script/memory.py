@@ -0,0 +1,92 @@
+"""Memory use of an evaluation: resident set size, a memory budget and the on-disk log of raw
+EV2R responses.
+
+EV2R keeps only the precision and recall of each claim in memory; the raw model responses,
+which grow with the submission size times the evidence length, are appended to a ResponseLog
+when one is given (evaluate(ev2r_response_log=...)) and dropped otherwise. With
+evaluate(memory_budget_mb=...) a run whose RSS grows over the budget fails with a MemoryError
+instead of getting the worker killed by the OS.
+"""
+import json
+import os
+import sys
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Claims between two checks of the memory budget
+BUDGET_CHECK_INTERVAL = 100
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (of the whole process, not of one run),
+    or None where getrusage is not available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def rss_mb():
+    """Current resident set size, or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024.0 * 1024.0)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryBudget:
+    """Raises MemoryError from check() once the RSS of the process is over budget_mb.
+
+    Checked every BUDGET_CHECK_INTERVAL calls; does nothing without a budget or where the RSS
+    cannot be read.
+    """
+
+    def __init__(self, budget_mb=None):
+        self.budget_mb = budget_mb
+        self.calls = 0
+
+    def check(self):
+        self.calls += 1
+        if not self.budget_mb or self.calls % BUDGET_CHECK_INTERVAL:
+            return
+        rss = rss_mb()
+        if rss is not None and rss > self.budget_mb:
+            raise MemoryError("The evaluation uses {:.0f} MB, over its memory budget of {} MB".format(
+                rss, self.budget_mb))
+
+
+class ResponseLog:
+    """Append-only jsonl file of raw model responses with the scores parsed from them."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "a")
+        self.written = 0
+
+    def write(self, response, scored):
+        entry = {"id": response.id, "gold": response.gold, "response": response.response}
+        if scored is not None:
+            entry["precision"], entry["recall"] = scored.response["precision"], scored.response["recall"]
+        self.file.write(json.dumps(entry) + "\n")
+        self.written += 1
+
+    def close(self):
+        self.file.close()
+
+
+def memory_report(response_log=None, budget=None):
+    report = {"peak_rss_mb": peak_rss_mb(), "rss_mb": rss_mb()}
+    if budget is not None and budget.budget_mb:
+        report["budget_mb"] = budget.budget_mb
+    if response_log is not None:
+        report["response_log"] = response_log.path
+        report["responses_logged"] = response_log.written
+    return report
@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+from nltk import word_tokenize
+from nltk.translate.bleu_score import SmoothingFunction, sentence_bleu
+
+
+def pairwise_bleu(candidate, reference):
+    return sentence_bleu([word_tokenize(reference)], word_tokenize(candidate),
+                         smoothing_function=SmoothingFunction().method1)
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for token_a in a:
+        current = [0]
+        for j, token_b in enumerate(b):
+            current.append(previous[j] + 1 if token_a == token_b else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def pairwise_rouge(candidate, reference):
+    """ROUGE-L F1 over lower-cased word tokens."""
+    candidate, reference = word_tokenize(candidate.lower()), word_tokenize(reference.lower())
+    lcs = lcs_length(candidate, reference)
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / float(len(candidate)), lcs / float(len(reference))
+    return 2 * precision * recall / (precision + recall)
+
+
+class EmbeddingSimilarity:
+    """Cosine similarity of sentence embeddings, computed on CPU as a cheap pre-screen for METEOR.
+
+    Every distinct string is encoded once (in batches through `encode`) and the pairwise scores of
+    a claim are a single matrix product. With `quantize`, vectors are stored as int8 with one scale
+    per vector. The model is a sentence-transformers model loaded from a local directory
+    (`model_path` or the EMBEDDING_MODEL_PATH environment variable) with the Hugging Face hub
+    disabled; any other encoder can be passed as a callable mapping a list of strings to an array.
+    Negative similarities are clipped to 0 so the scores stay in the [0, 1] range of the other metrics.
+    """
+
+    def __init__(self, model_path=None, quantize=False, batch_size=64, encoder=None):
+        self.quantize = quantize
+        self.batch_size = batch_size
+        if encoder is None:
+            encoder = self.load_local_encoder(model_path or os.environ.get("EMBEDDING_MODEL_PATH"))
+        self.encoder = encoder
+        self.vectors = {}
+        self.scales = {}
+
+    def load_local_encoder(self, model_path):
+        if not model_path or not os.path.isdir(model_path):
+            raise ValueError("The embedding metric needs a local model directory, got {!r}".format(model_path))
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("The embedding metric requires the sentence-transformers package")
+        model = SentenceTransformer(model_path, device="cpu")
+        return lambda strings: model.encode(strings, batch_size=self.batch_size, convert_to_numpy=True)
+
+    def encode(self, strings):
+        new_strings = list(dict.fromkeys(s for s in strings if s not in self.vectors))
+        if not new_strings:
+            return
+        vectors = np.asarray(self.encoder(new_strings), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if self.quantize:
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            vectors = np.round(vectors / scales[:, None]).astype(np.int8)
+            self.scales.update(zip(new_strings, scales))
+        self.vectors.update(zip(new_strings, vectors))
+
+    def score_matrix(self, src_data, tgt_data):
+        self.encode(list(src_data) + list(tgt_data))
+        if not src_data or not tgt_data:
+            return np.empty((len(src_data), len(tgt_data)))
+        src_vectors = np.stack([self.vectors[s] for s in src_data])
+        tgt_vectors = np.stack([self.vectors[s] for s in tgt_data])
+        if self.quantize:
+            scores = (src_vectors.astype(np.int32) @ tgt_vectors.astype(np.int32).T).astype(float)
+            scores *= np.array([self.scales[s] for s in src_data])[:, None]
+            scores *= np.array([self.scales[s] for s in tgt_data])[None, :]
+        else:
+            scores = (src_vectors @ tgt_vectors.T).astype(float)
+        return np.clip(scores, 0.0, 1.0)
+
+    def __call__(self, candidate, reference):
+        return self.score_matrix([candidate], [reference])[0, 0]
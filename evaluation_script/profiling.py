@@ -0,0 +1,148 @@
+"""Opt-in sampling profiler for evaluation runs.
+
+Enabled with evaluate(profile=...) or the EVALUATION_PROFILE environment variable, set to a
+directory or to 1 for the directory of the submission file. A background thread samples the
+stack of the evaluating thread every `profile_interval` seconds, so LLM waits show up next to
+tokenization, WordNet lookups or copies. Each run writes:
+
+    <name>.collapsed          one "frame;frame;frame <microseconds>" line per stack, the input
+                              of flamegraph.pl, inferno or speedscope
+    <name>.speedscope.json    the same profile for https://www.speedscope.app
+    <name>_claims.tsv         per EV2R claim: LLM requests, LLM wait, CPU time and wall time
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+PROFILE_ENV = "EVALUATION_PROFILE"
+DEFAULT_INTERVAL = 0.005
+
+
+def profile_dir(option, user_submission_file):
+    """The directory to write profiles to, or None when profiling is off."""
+    if option is None:
+        option = os.environ.get(PROFILE_ENV)
+    if option is None or option is False or str(option).lower() in ("", "0", "false"):
+        return None
+    if option is True or str(option).lower() in ("1", "true"):
+        return os.path.dirname(os.path.abspath(user_submission_file))
+    return option
+
+
+def frame_name(code):
+    path = code.co_filename.replace(os.sep, "/").split("/")
+    return "{} ({}:{})".format(code.co_name, "/".join(path[-2:]), code.co_firstlineno)
+
+
+class SamplingProfiler:
+    """Samples the stacks of one thread from a background thread; used as a context manager."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        # (frame names from the root) -> sampled seconds
+        self.stacks = {}
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.start_time = self.end_time = None
+
+    def __enter__(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self.run, name="evaluation-profiler", daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        self.end_time = time.perf_counter()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                return
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            stack = tuple(reversed(stack))
+            # Weighted by the time since the previous sample, so a late sampler does not skew the profile
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + now - last
+            self.samples += 1
+            last = now
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                f.write("{} {}\n".format(";".join(stack), int(round(seconds * 1e6))))
+
+    def write_speedscope(self, path, name):
+        frames, frame_index, samples, weights = [], {}, [], []
+        for stack, seconds in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame})
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(seconds)
+        with open(path, "w") as f:
+            json.dump({
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "name": name,
+                "exporter": "evaluation_script.profiling",
+                "shared": {"frames": frames},
+                "profiles": [{
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }],
+            }, f)
+
+
+def write_claim_timings(path, claim_timings):
+    # claim_id may be any json value of the gold file, the timings are seconds
+    seconds = ["llm_wait", "cpu_time", "other_wait", "wall_time"]
+    with open(path, "w") as f:
+        f.write("\t".join(["claim_id", "llm_requests"] + seconds) + "\n")
+        for timing in claim_timings:
+            f.write("\t".join([str(timing["claim_id"]), str(timing["llm_requests"])] +
+                              ["{:.6f}".format(timing[column]) for column in seconds]) + "\n")
+
+
+def write_profile(profiler, claim_timings, directory, run_name=None):
+    """Writes the profile files of one run and returns its summary for the submission metadata.
+
+    run_name tells apart runs of one process that finish within the same second.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = "evaluation_profile_{}_{}".format(time.strftime("%Y%m%d-%H%M%S"), os.getpid())
+    if run_name:
+        name += "_{}".format(run_name)
+    base = os.path.join(directory, name)
+    files = [base + ".collapsed", base + ".speedscope.json", base + "_claims.tsv"]
+    profiler.write_collapsed(files[0])
+    profiler.write_speedscope(files[1], name)
+    write_claim_timings(files[2], claim_timings)
+    return {
+        "files": files,
+        "samples": profiler.samples,
+        "interval": profiler.interval,
+        "wall_time": profiler.end_time - profiler.start_time,
+        "ev2r_claims": len(claim_timings),
+        "ev2r_llm_wait": sum(timing["llm_wait"] for timing in claim_timings),
+        "ev2r_cpu_time": sum(timing["cpu_time"] for timing in claim_timings),
+    }
@@ -0,0 +1,112 @@
+"""Pre-rendered EV2R prompts of a gold file.
+
+Every EV2R prompt is the few-shot head of its template, a part that only depends on the gold
+claim (the claim and, for reference-based prompts, the reference evidence), the predicted
+evidence and a short tail. A PromptStore renders the per-claim parts of a gold file once and
+shares the head, so scoring a submission only joins the predicted evidence in.
+
+The store is kept per process for every gold file and prompt type (see service.py). With
+evaluate(prompt_store_dir=...) the per-claim parts are also written there once per gold file
+content, as a UTF-8 string table with an offsets array, and memory-mapped by later processes.
+"""
+import mmap
+import os
+import threading
+
+import numpy as np
+
+import evaluation_script.claim_cache as claim_cache
+import evaluation_script.properties as properties
+
+
+def predicted_evidence(src):
+    return "".join("Question: " + qa["question"] + "\n" + "Answer: " + qa["answer"] + "\n\n"
+                   for qa in src['evidence'])
+
+
+def reference_evidence(tgt):
+    return "".join("Question: " + qa["question"] + "\n" + "Answer: " + qa["answers"][0]["answer"] + "\n\n"
+                   for qa in tgt['questions'])
+
+
+def split_prompt_template(template):
+    """The text before the first field, the fields up to the last one and the text after it.
+
+    The last field of every EV2R template is the predicted evidence.
+    """
+    first, last = template.index("{}"), template.rindex("{}")
+    return template[:first].format(), template[first:last], template[last + 2:].format()
+
+
+class PromptStore:
+
+    def __init__(self, references, prompt_type, table_path=None):
+        self.head, self.claim_template, self.tail = split_prompt_template(properties.PROMPT_MAPPING[prompt_type])
+        self.reference_free = prompt_type == properties.PromptTypes.ATOMIC_FACTS
+        self.references = references
+        # Same identification of gold claims as validation.validate_submission
+        self.index = {tgt.get("claim_id", i): i for i, tgt in enumerate(references)}
+        self.parts = [None] * len(references)
+        self.offsets = self.strings = None
+        if table_path is not None:
+            if not os.path.exists(table_path + ".offsets.npy"):
+                self.write_table(table_path)
+            self.offsets = np.load(table_path + ".offsets.npy", mmap_mode="r")
+            with open(table_path + ".strings", "rb") as f:
+                self.strings = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    def render_part(self, tgt):
+        if self.reference_free:
+            return self.claim_template.format(tgt['claim'])
+        return self.claim_template.format(tgt['claim'], reference_evidence(tgt))
+
+    def write_table(self, table_path):
+        encoded = [self.render_part(tgt).encode("utf-8") for tgt in self.references]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(part) for part in encoded], out=offsets[1:])
+        # Written under temporary names and renamed, so a concurrent reader never sees half a table
+        suffix = ".{}.tmp".format(os.getpid())
+        with open(table_path + ".strings" + suffix, "wb") as f:
+            f.write(b"".join(encoded))
+        with open(table_path + ".offsets.npy" + suffix, "wb") as f:
+            np.save(f, offsets)
+        os.replace(table_path + ".strings" + suffix, table_path + ".strings")
+        os.replace(table_path + ".offsets.npy" + suffix, table_path + ".offsets.npy")
+
+    def part(self, position):
+        if self.offsets is not None:
+            return self.strings[self.offsets[position]:self.offsets[position + 1]].decode("utf-8")
+        part = self.parts[position]
+        if part is None:
+            part = self.parts[position] = self.render_part(self.references[position])
+        return part
+
+    def render(self, claim_id, evidence):
+        """The prompt of a gold claim with the given predicted evidence string."""
+        return "".join((self.head, self.part(self.index[claim_id]), evidence, self.tail))
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_prompt_store(test_annotation_file, prompt_type, store_dir=None):
+    """The PromptStore of a gold file, built once per process and gold file version."""
+    import evaluation_script.main as main
+
+    path = os.path.abspath(test_annotation_file)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size, prompt_type, store_dir)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            table_path = None
+            if store_dir:
+                os.makedirs(store_dir, exist_ok=True)
+                table_path = os.path.join(store_dir, "{}_{}".format(claim_cache.file_sha256(path)[:16],
+                                                                     prompt_type.value))
+            # Older versions of the gold file are dropped
+            for old_key in [old_key for old_key in _STORES if old_key[0] == path and old_key[1:3] != key[1:3]]:
+                del _STORES[old_key]
+            store = _STORES[key] = PromptStore(main.load_references(path), prompt_type, table_path)
+    return store
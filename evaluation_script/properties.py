@@ -4,6 +4,7 @@ from enum import Enum
 from typing import List
 from typing import Optional, Union
 
+import numpy as np
 import torch
 from aenum import MultiValueEnum
 from torch.utils.data import DataLoader
@@ -67,19 +68,55 @@ class ScoreMetrics(enum.Enum):
 
 
 class PseudoTrainedScorerDataset(torch.utils.data.Dataset):
-    def __init__(self, encodings, labels):
-        self.encodings = encodings
-        self.labels = labels
+    """Tokenized scorer inputs stored as one flat int array per key plus per-item offsets.
+
+    Padding in the given encodings (right padding, detected through the attention mask) is
+    dropped; items are padded again only up to the longest item of their batch by `collate`.
+    Use `length_buckets` as the DataLoader batch_sampler and `collate` as its collate_fn.
+    """
+
+    def __init__(self, encodings, labels, pad_token_id=0):
+        if "attention_mask" in encodings:
+            lengths = np.array([int(np.sum(mask)) for mask in encodings["attention_mask"]], dtype=np.int64)
+        else:
+            lengths = np.array([len(ids) for ids in encodings["input_ids"]], dtype=np.int64)
+        self.lengths = lengths
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)])
+        self.encodings = {
+            key: np.concatenate([np.asarray(val[i][:lengths[i]], dtype=np.int64) for i in range(len(lengths))])
+            if len(lengths) else np.empty(0, dtype=np.int64)
+            for key, val in encodings.items()
+        }
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.pad_values = {"input_ids": pad_token_id}
 
     def __getitem__(self, idx):
-        item = {key: torch.tensor(val[idx]) for key, val in self.encodings.items()}
-        item['labels'] = torch.tensor(self.labels[idx])
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        item = {key: val[start:end] for key, val in self.encodings.items()}
+        item['labels'] = self.labels[idx]
 
         return item
 
     def __len__(self):
         return len(self.labels)
 
+    def length_buckets(self, batch_size):
+        """Batches of indices sorted by length, so that each batch needs little padding."""
+        order = np.argsort(self.lengths, kind="stable")
+        return [order[i:i + batch_size].tolist() for i in range(0, len(order), batch_size)]
+
+    def collate(self, items):
+        max_length = max(len(item["input_ids"]) for item in items)
+        batch = {}
+        for key in self.encodings:
+            padded = np.full((len(items), max_length), self.pad_values.get(key, 0), dtype=np.int64)
+            for row, item in enumerate(items):
+                padded[row, :len(item[key])] = item[key]
+            batch[key] = torch.from_numpy(padded)
+        batch['labels'] = torch.from_numpy(np.array([item['labels'] for item in items], dtype=np.int64))
+
+        return batch
+
 
 class ModelApi(enum.Enum):
     # GPT4o = "gpt-4o-2024-08-06"
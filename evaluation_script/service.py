@@ -0,0 +1,221 @@
+"""Long-lived local evaluation service.
+
+Starting a fresh process per submission reloads NLTK data, the LLM clients and the gold file
+every time. The service imports the evaluation code and loads WordNet once, keeps the parsed
+gold files in memory and evaluates submissions from a bounded queue with a pool of worker
+threads:
+
+    python -m evaluation_script.service --port 8765 --workers 4 --preload annotations/averitec_dev_gold.json
+
+With EVALUATION_SERVICE_URL set (or the `evaluation_service_url` keyword argument), `evaluate()`
+forwards the submission to the service and returns its output. The API is plain JSON over HTTP:
+
+    POST /evaluate   {"test_annotation_file", "user_submission_file" or "submission",
+                      "phase_codename", "options": {...evaluate kwargs}, "wait": true}
+    GET  /jobs/<id>  status and, once finished, the output of a job
+    GET  /health     queue length, workers and loaded gold files
+
+File paths are resolved on the service host.
+"""
+import argparse
+import itertools
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICE_URL_ENV = "EVALUATION_SERVICE_URL"
+DEFAULT_PORT = 8765
+REQUEST_TIMEOUT = 24 * 60 * 60
+# Finished jobs kept for GET /jobs/<id>, without their request; older ones are dropped
+MAX_KEPT_JOBS = 1000
+
+
+def evaluate_remote(service_url, test_annotation_file, user_submission_file, phase_codename, **kwargs):
+    """Thin client: has the service evaluate the submission and returns the output of evaluate()."""
+    payload = {
+        "test_annotation_file": os.path.abspath(test_annotation_file),
+        "user_submission_file": os.path.abspath(user_submission_file),
+        "phase_codename": phase_codename,
+        "options": kwargs,
+        "wait": True,
+    }
+    request = urllib.request.Request(service_url.rstrip("/") + "/evaluate", data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+        job = json.loads(response.read().decode("utf-8"))
+    if job["status"] != "finished":
+        raise RuntimeError("Evaluation service job {} {}: {}".format(job["id"], job["status"], job.get("error")))
+    return job["output"]
+
+
+class EvaluationService:
+    """Evaluates queued submissions on worker threads that share one warm evaluation module."""
+
+    def __init__(self, workers=2, max_queued=64):
+        # Imported here rather than at module level: main.evaluate imports this module for the client
+        import evaluation_script.main as main
+
+        self.main = main
+        # Before any worker thread can reach the lazily loaded NLTK corpora
+        self.nltk_ready = main.warm_up_nltk()
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.pending = queue.Queue(maxsize=max_queued)
+        self.lock = threading.Lock()
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def preload(self, test_annotation_file):
+        self.main.load_references(test_annotation_file)
+
+    def submit(self, request):
+        """Queues a submission; raises queue.Full when the service is saturated."""
+        job = {
+            "id": next(self.job_ids),
+            "status": "queued",
+            "submitted_at": time.time(),
+            "done": threading.Event(),
+        }
+        if "submission" in request:
+            # Submission content sent inline instead of a path on this host; only the file is kept
+            with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+                json.dump(request["submission"], f)
+            request = {key: value for key, value in request.items() if key != "submission"}
+            request.update(user_submission_file=f.name, inline_submission=True)
+        job["request"] = request
+        with self.lock:
+            self.jobs[job["id"]] = job
+            if len(self.jobs) > MAX_KEPT_JOBS:
+                finished = [job_id for job_id, old in self.jobs.items() if old["done"].is_set()]
+                for job_id in finished[:len(self.jobs) - MAX_KEPT_JOBS]:
+                    del self.jobs[job_id]
+        try:
+            self.pending.put_nowait(job)
+        except queue.Full:
+            with self.lock:
+                del self.jobs[job["id"]]
+            if request.get("inline_submission"):
+                os.remove(request["user_submission_file"])
+            raise
+        return job
+
+    def work(self):
+        while True:
+            job = self.pending.get()
+            request = job["request"]
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            try:
+                options = dict(request.get("options") or {})
+                options.setdefault("submission_metadata", {})
+                options["profile_name"] = "job{}".format(job["id"])
+                job["output"] = self.main.evaluate_local(request["test_annotation_file"],
+                                                         request["user_submission_file"],
+                                                         request["phase_codename"], **options)
+                job["status"] = "finished"
+            except Exception as e:
+                traceback.print_exc()
+                job["error"] = str(e)
+                job["status"] = "failed"
+            finally:
+                if request.get("inline_submission"):
+                    os.remove(request["user_submission_file"])
+                # Only the status and output are served once a job is done
+                del job["request"]
+                job["finished_at"] = time.time()
+                job["done"].set()
+                self.pending.task_done()
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def describe(self, job):
+        keys = ["id", "status", "submitted_at", "started_at", "finished_at", "output", "error"]
+        return {key: job[key] for key in keys if key in job}
+
+    def health(self):
+        return {
+            "queued": self.pending.qsize(),
+            "workers": len(self.workers),
+            "jobs": len(self.jobs),
+            "gold_files": self.main.loaded_reference_files(),
+            "nltk_ready": self.nltk_ready,
+        }
+
+
+class EvaluationRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def send_json(self, status, body):
+        data = json.dumps(body, default=float).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            return self.send_json(200, self.service.health())
+        if self.path.startswith("/jobs/"):
+            try:
+                job = self.service.get_job(int(self.path[len("/jobs/"):]))
+            except ValueError:
+                job = None
+            if job is None:
+                return self.send_json(404, {"error": "unknown job"})
+            return self.send_json(200, self.service.describe(job))
+        self.send_json(404, {"error": "unknown path"})
+
+    def do_POST(self):
+        if self.path != "/evaluate":
+            return self.send_json(404, {"error": "unknown path"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            missing = [key for key in ("test_annotation_file", "phase_codename") if key not in request]
+            if "user_submission_file" not in request and "submission" not in request:
+                missing.append("user_submission_file")
+            if missing:
+                return self.send_json(400, {"error": "missing fields: {}".format(missing)})
+            job = self.service.submit(request)
+        except ValueError as e:
+            return self.send_json(400, {"error": "invalid request: {}".format(e)})
+        except queue.Full:
+            return self.send_json(503, {"error": "evaluation queue is full"})
+
+        if request.get("wait", True):
+            job["done"].wait()
+        self.send_json(200, self.service.describe(job))
+
+    def log_message(self, format, *args):
+        print("{} - {}".format(self.address_string(), format % args))
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, workers=2, max_queued=64, preload=()):
+    service = EvaluationService(workers=workers, max_queued=max_queued)
+    for test_annotation_file in preload:
+        service.preload(test_annotation_file)
+        print("Loaded gold file {}".format(test_annotation_file))
+    handler = type("Handler", (EvaluationRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print("Evaluation service listening on http://{}:{}".format(host, server.server_address[1]))
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived local evaluation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-queued", type=int, default=64)
+    parser.add_argument("--preload", nargs="*", default=[], help="gold files to load at startup")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.max_queued, args.preload)
@@ -0,0 +1,350 @@
+"""Sharded evaluation: a coordinator splits the claims into index ranges and workers score them.
+
+Shards go through a file queue, a directory shared by the coordinator and the workers (local
+processes, or other hosts on a shared filesystem):
+
+    tasks/shard_00003.json      waiting; a worker claims it by renaming it into running/
+    running/shard_00003.json    being scored; the worker touches it every HEARTBEAT_INTERVAL
+    results/shard_00003.json    per-claim scores of the range, or an "error"
+
+A claim that has not been touched for LEASE_TIMEOUT seconds belongs to a worker that died and
+goes back to tasks/ for another worker.
+
+A worker scores its range with evaluate_local(claim_range=..., score_only=True), so shards use
+exactly the scoring code of a single-process run, each with its own API key and CPU budget:
+
+    GEMINI_API_KEY=... python -m evaluation_script.sharding worker --queue-dir /shared/queue
+
+The coordinator writes the per-claim scores into a ClaimResultCache in claim order and runs
+evaluate_local over it, so the output has the structure of evaluate() whatever the order in
+which shards finish. Claims a shard could not score (e.g. failed LLM requests) are scored by
+the coordinator in that last step.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import evaluation_script.claim_cache as claim_cache
+
+# evaluate() options passed on to the workers: those that change the per-claim scores, the
+# memory budget and the profiler of each worker
+SHARD_OPTIONS = [
+    "ev2r_cascade",
+    "ev2r_cascade_margin",
+    "ev2r_label_first",
+    "ev2r_full_report",
+    "ev2r_prompt_type",
+    "fact_cache_dir",
+    "averitec_scores",
+    "averitec_metric",
+    "averitec_metric_options",
+    "max_claims",
+    "memory_budget_mb",
+    "profile",
+    "profile_interval",
+]
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 30.0
+LEASE_TIMEOUT = 300.0
+# Characters of a failed local worker's stderr quoted in the error
+STDERR_TAIL = 4000
+
+
+def write_json_atomic(path, content):
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def shard_ranges(n_claims, n_shards):
+    """Contiguous [start, end) claim ranges of near equal size."""
+    n_shards = max(1, min(n_shards, n_claims))
+    bounds = [n_claims * i // n_shards for i in range(n_shards + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+class FileQueue:
+
+    def __init__(self, queue_dir):
+        self.queue_dir = queue_dir
+        self.dirs = {name: os.path.join(queue_dir, name) for name in ("tasks", "running", "results", "work")}
+        for path in self.dirs.values():
+            os.makedirs(path, exist_ok=True)
+
+    def put(self, name, task):
+        write_json_atomic(os.path.join(self.dirs["tasks"], name + ".json"), task)
+
+    def requeue_expired(self, lease_timeout=LEASE_TIMEOUT):
+        """Moves claims without a heartbeat for lease_timeout seconds back to tasks/."""
+        for file_name in os.listdir(self.dirs["running"]):
+            running_path = os.path.join(self.dirs["running"], file_name)
+            try:
+                if time.time() - os.path.getmtime(running_path) <= lease_timeout:
+                    continue
+                os.rename(running_path, os.path.join(self.dirs["tasks"], file_name))
+            except OSError:
+                # Finished or requeued by someone else in the meantime
+                continue
+            print("Requeued {}, its worker stopped sending heartbeats".format(file_name))
+
+    def heartbeat(self, name, stop):
+        running_path = os.path.join(self.dirs["running"], name + ".json")
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                os.utime(running_path)
+            except OSError:
+                return
+
+    def claim(self):
+        """The name and content of a waiting task, now owned by the caller, or None."""
+        self.requeue_expired()
+        for file_name in sorted(os.listdir(self.dirs["tasks"])):
+            if not file_name.endswith(".json"):
+                continue
+            running_path = os.path.join(self.dirs["running"], file_name)
+            try:
+                # Atomic on one filesystem: exactly one worker wins the rename
+                os.rename(os.path.join(self.dirs["tasks"], file_name), running_path)
+            except OSError:
+                continue
+            # The rename keeps the mtime of the task, which may be older than the lease already
+            os.utime(running_path)
+            with open(running_path) as f:
+                return file_name[:-len(".json")], json.load(f)
+        return None
+
+    def finish(self, name, result):
+        write_json_atomic(os.path.join(self.dirs["results"], name + ".json"), result)
+        try:
+            os.remove(os.path.join(self.dirs["running"], name + ".json"))
+        except FileNotFoundError:
+            # The lease expired and another worker scored the shard again
+            pass
+
+    def result(self, name):
+        path = os.path.join(self.dirs["results"], name + ".json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+
+def run_shard(queue, name, task):
+    import evaluation_script.main as main
+
+    options = dict(task["options"], submission_metadata={}, claim_range=task["claim_range"], score_only=True,
+                   result_cache_dir=os.path.join(queue.dirs["work"], name), profile_name=name)
+    if task.get("response_log"):
+        # Appended to the coordinator's log in shard order once every shard is done
+        options["ev2r_response_log"] = shard_response_log(queue, name)
+    output = main.evaluate_local(task["test_annotation_file"], task["user_submission_file"],
+                                 task["phase_codename"], **options)
+    return {"claim_range": task["claim_range"], "values": output["values"], "counters": output["counters"],
+            "profile": output.get("submission_metadata", {}).get("profile"), "worker": worker_name()}
+
+
+def shard_response_log(queue, name):
+    return os.path.join(queue.dirs["work"], name + ".responses.jsonl")
+
+
+def merge_response_logs(queue, names, response_log):
+    """Appends the response logs of the shards to response_log; returns the number of lines."""
+    lines = 0
+    directory = os.path.dirname(os.path.abspath(response_log))
+    os.makedirs(directory, exist_ok=True)
+    with open(response_log, "a") as merged:
+        for name in names:
+            path = shard_response_log(queue, name)
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        merged.write(line)
+                        lines += 1
+    return lines
+
+
+def worker_name():
+    return "{}:{}".format(socket.gethostname(), os.getpid())
+
+
+def configure_api_key():
+    """Lets every worker node use its own Gemini key."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if api_key:
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+
+
+def work(queue_dir, exit_when_empty=False):
+    """Scores shards from the queue until it is empty (with exit_when_empty) or forever."""
+    configure_api_key()
+    queue = FileQueue(queue_dir)
+    while True:
+        claimed = queue.claim()
+        if claimed is None:
+            if exit_when_empty:
+                return
+            time.sleep(POLL_INTERVAL)
+            continue
+        name, task = claimed
+        print("{} scoring {} (claims {}..{})".format(worker_name(), name, *task["claim_range"]))
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=queue.heartbeat, args=(name, stop), daemon=True)
+        heartbeat.start()
+        try:
+            result = run_shard(queue, name, task)
+        except Exception as e:
+            result = {"claim_range": task["claim_range"], "error": repr(e), "worker": worker_name()}
+        finally:
+            stop.set()
+        queue.finish(name, result)
+
+
+def spawn_local_workers(queue, n_workers):
+    """Worker processes on this host; the stderr of each goes to work/worker_<i>.stderr of the queue."""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+    processes = []
+    for i in range(n_workers):
+        stderr_path = os.path.join(queue.dirs["work"], "worker_{}.stderr".format(i))
+        with open(stderr_path, "wb") as stderr:
+            process = subprocess.Popen([sys.executable, "-m", "evaluation_script.sharding", "worker",
+                                        "--queue-dir", queue.queue_dir, "--exit-when-empty"],
+                                       env=env, stderr=stderr)
+        process.stderr_path = stderr_path
+        processes.append(process)
+    return processes
+
+
+def local_worker_failure(processes):
+    """Exit codes and stderr of the local workers, as the message of a failed evaluation."""
+    lines = []
+    for process in processes:
+        with open(process.stderr_path, errors="replace") as f:
+            stderr = f.read()[-STDERR_TAIL:].strip()
+        lines.append("worker pid {} exited with code {}{}".format(
+            process.pid, process.returncode, ":\n" + stderr if stderr else ""))
+    return "\n".join(lines)
+
+
+def evaluate_sharded(test_annotation_file, user_submission_file, phase_codename, **kwargs):
+    """evaluate() with the per-claim scoring spread over shard workers.
+
+    `shards`: number of claim ranges; `shard_workers`: local worker processes to start (0 when
+    workers run elsewhere); `shard_queue_dir`: queue directory shared with the workers (a
+    temporary directory by default, only usable by local workers); `shard_timeout`: seconds to
+    wait for all shards.
+
+    Fails once every local worker has exited while shards are missing and no other worker can
+    score them: a local worker failed, or the queue directory is the temporary one.
+    """
+    import evaluation_script.main as main
+
+    start_time = time.time()
+    test_annotation_file = os.path.abspath(test_annotation_file)
+    user_submission_file = os.path.abspath(user_submission_file)
+    predictions, references = main.load_claims(test_annotation_file, user_submission_file,
+                                               max_claims=kwargs.get("max_claims", main.MAX_CLAIMS))
+    # Fails before the shards are queued, like evaluate_local would before scoring
+    main.load_comparison_records(predictions, kwargs)
+    ranges = shard_ranges(len(predictions), kwargs.pop("shards"))
+    n_workers = kwargs.pop("shard_workers", len(ranges))
+    timeout = kwargs.pop("shard_timeout", None)
+    queue_dir = kwargs.pop("shard_queue_dir", None)
+    own_queue_dir = queue_dir is None
+    if own_queue_dir:
+        queue_dir = tempfile.mkdtemp(prefix="evaluation_shards_")
+
+    queue = FileQueue(queue_dir)
+    names = ["shard_{:05d}".format(i) for i in range(len(ranges))]
+    options = {key: kwargs[key] for key in SHARD_OPTIONS if key in kwargs}
+    for name, claim_range in zip(names, ranges):
+        queue.put(name, {
+            "test_annotation_file": test_annotation_file,
+            "user_submission_file": user_submission_file,
+            "phase_codename": phase_codename,
+            "claim_range": claim_range,
+            "options": options,
+            "response_log": bool(kwargs.get("ev2r_response_log")),
+        })
+    print("Queued {} shards of {} claims in {}".format(len(ranges), len(predictions), queue_dir))
+    processes = spawn_local_workers(queue, n_workers)
+
+    try:
+        results = {}
+        while len(results) < len(names):
+            # Checked before the results, so that the results of exited workers are seen below
+            workers_exited = bool(processes) and all(process.poll() is not None for process in processes)
+            for name in names:
+                if name not in results:
+                    result = queue.result(name)
+                    if result is not None:
+                        if "error" in result:
+                            raise RuntimeError("Shard {} failed on {}: {}".format(name, result["worker"],
+                                                                                  result["error"]))
+                        results[name] = result
+            if workers_exited and len(results) < len(names) and (
+                    own_queue_dir or any(process.returncode for process in processes)):
+                raise RuntimeError("{} of {} shards finished and all local workers exited\n{}".format(
+                    len(results), len(names), local_worker_failure(processes)))
+            queue.requeue_expired()
+            if timeout is not None and time.time() - start_time > timeout:
+                raise RuntimeError("{} of {} shards finished within {} seconds".format(
+                    len(results), len(names), timeout))
+            if len(results) < len(names):
+                time.sleep(POLL_INTERVAL)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    # Deterministic merge: per-claim scores are stored in claim order, whatever the shard order
+    merged_dir = kwargs.get("result_cache_dir") or os.path.join(queue_dir, "merged")
+    cache = claim_cache.ClaimResultCache(merged_dir, test_annotation_file,
+                                         main.build_ev2r_scorer(kwargs).get_cache_namespace())
+    for name in names:
+        start, _ = results[name]["claim_range"]
+        for offset, values in enumerate(results[name]["values"]):
+            cache.update(predictions[start + offset], start + offset, **values)
+
+    logged = 0
+    if kwargs.get("ev2r_response_log"):
+        logged = merge_response_logs(queue, names, kwargs["ev2r_response_log"])
+
+    # The request, usage, cascade and fact cache reports of the last pass include the shards
+    counters = [results[name]["counters"] for name in names]
+    output = main.evaluate_local(test_annotation_file, user_submission_file, phase_codename,
+                                 **dict(kwargs, result_cache_dir=merged_dir, ev2r_counters=counters))
+    metadata = output.setdefault("submission_metadata", {})
+    if logged:
+        metadata["memory"]["responses_logged"] += logged
+    if "result_cache_dir" not in kwargs:
+        metadata.pop("result_cache", None)
+    metadata["sharding"] = {
+        "shards": len(names),
+        "workers": sorted({result["worker"] for result in results.values()}),
+        "profiles": [results[name]["profile"]["files"] for name in names if results[name]["profile"]],
+        "wall_time": time.time() - start_time,
+    }
+    if own_queue_dir:
+        shutil.rmtree(queue_dir, ignore_errors=True)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded evaluation worker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="score shards from a queue directory")
+    worker_parser.add_argument("--queue-dir", required=True)
+    worker_parser.add_argument("--exit-when-empty", action="store_true")
+    args = parser.parse_args()
+    work(args.queue_dir, args.exit_when_empty)
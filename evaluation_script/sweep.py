@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+
+import evaluation_script.labels as labels
+
+# Utilities stored per claim, and the score name reported for each of them by sweep_scores.
+SWEEP_METRICS = {
+    "ev2r_recall": "EV2R Score",
+    "ev2r_precision": "EV2R Precision Score",
+    "qa_utility": "AVeriTeC Score",
+    "q_utility": "AVeriTeC Q Score",
+}
+
+
+def _to_float(value):
+    if value is None or isinstance(value, str):
+        return None
+    return float(value)
+
+
+def build_per_claim_records(predictions, references, ev2r_precision=None, ev2r_recall=None,
+                            q_utilities=None, qa_utilities=None, ev2r_scores=None, averitec_scores=None):
+    """Collects the raw per-claim scores of one run so thresholds can be changed without re-scoring."""
+    records = []
+    label_match = labels.label_agreement(predictions, references)
+    for i, (src, tgt) in enumerate(zip(predictions, references)):
+        record = {
+            "claim_id": src.get("claim_id", i),
+            "pred_label": src["pred_label"],
+            "label": tgt["label"],
+            "label_match": bool(label_match[i]),
+        }
+        if ev2r_recall is not None:
+            record["ev2r_precision"] = _to_float(ev2r_precision[i])
+            record["ev2r_recall"] = _to_float(ev2r_recall[i])
+            if isinstance(ev2r_recall[i], str):
+                record["ev2r_status"] = ev2r_recall[i]
+        if ev2r_scores is not None:
+            record["ev2r_score"] = float(ev2r_scores[i])
+        if q_utilities is not None:
+            record["q_utility"] = _to_float(q_utilities[i])
+        if qa_utilities is not None:
+            record["qa_utility"] = _to_float(qa_utilities[i])
+        if averitec_scores is not None:
+            record["averitec_score"] = float(averitec_scores[i])
+        records.append(record)
+
+    return records
+
+
+def save_per_claim_records(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_per_claim_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def records_to_arrays(records):
+    """Column view of the per-claim records; missing utilities become NaN."""
+    arrays = {"label_match": np.array([r["label_match"] for r in records], dtype=bool)}
+    for key in SWEEP_METRICS:
+        if any(key in r for r in records):
+            values = [r.get(key) for r in records]
+            arrays[key] = np.array([np.nan if v is None else v for v in values], dtype=float)
+
+    return arrays
+
+
+def threshold_sweep(utilities, label_match, thresholds):
+    """Fraction of claims with a correct label and a utility strictly above each threshold.
+
+    Equivalent to the per-level loops of evaluate_ev2r_score / evaluate_averitec_score,
+    but costs one sort plus one binary search per threshold.
+    """
+    utilities = np.asarray(utilities, dtype=float)
+    label_match = np.asarray(label_match, dtype=bool)
+    thresholds = np.asarray(thresholds, dtype=float)
+    if utilities.size == 0:
+        return np.zeros(thresholds.shape)
+
+    correct = np.sort(utilities[label_match & ~np.isnan(utilities)])
+    above = correct.size - np.searchsorted(correct, thresholds, side="right")
+    return above / float(utilities.size)
+
+
+def sweep_scores(records, thresholds=None):
+    """Scores of every stored metric at every threshold, e.g. sweep_scores(records)["EV2R Score"]."""
+    if thresholds is None:
+        thresholds = np.linspace(0.0, 1.0, 1001)
+    arrays = records if isinstance(records, dict) else records_to_arrays(records)
+
+    results = {"thresholds": np.asarray(thresholds, dtype=float),
+               "Label Accuracy": float(np.mean(arrays["label_match"])) if arrays["label_match"].size else 0.0}
+    for key, name in SWEEP_METRICS.items():
+        if key in arrays:
+            results[name] = threshold_sweep(arrays[key], arrays["label_match"], thresholds)
+
+    return results
@@ -0,0 +1,24 @@
+import time
+
+
+class StageTimer:
+    """Wall and CPU time of the successive stages of one evaluation.
+
+    lap(name) charges the time since the previous lap (or since the timer was created) to the
+    stage `name`, so a stage is timed by calling lap once it is done.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.last_wall = time.perf_counter()
+        self.last_cpu = time.process_time()
+
+    def lap(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        stage = self.stages.setdefault(name, {"wall_time": 0.0, "cpu_time": 0.0})
+        stage["wall_time"] += wall - self.last_wall
+        stage["cpu_time"] += cpu - self.last_cpu
+        self.last_wall, self.last_cpu = wall, cpu
+
+    def report(self):
+        return {name: dict(stage) for name, stage in self.stages.items()}
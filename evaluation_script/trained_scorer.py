@@ -0,0 +1,132 @@
+import inspect
+import os
+
+import numpy as np
+import torch
+
+import evaluation_script.labels as labels
+import evaluation_script.properties as properties
+
+
+class TrainedScorer:
+    """Offline alternative to the LLM judge: a locally stored, fine-tuned verdict classifier.
+
+    PSEUDO_TRAINED reads (claim, predicted evidence) and REF_TRAINED reads (claim + reference
+    evidence, predicted evidence); the per-claim score is the probability the classifier gives to
+    the gold verdict, so evidence that lets the classifier recover the gold label scores high.
+    Inference runs on CPU in length-bucketed batches padded to the longest sequence of each batch,
+    either with the PyTorch model or with an ONNX export (optionally int8) through onnxruntime.
+    """
+
+    reporting_levels = [0.5]
+
+    def __init__(self, model_path, prompt_type=properties.PromptTypes.PSEUDO_TRAINED, batch_size=32,
+                 max_length=512, num_threads=None, onnx_path=None):
+        if prompt_type not in (properties.PromptTypes.PSEUDO_TRAINED, properties.PromptTypes.REF_TRAINED):
+            raise ValueError("TrainedScorer supports the pseudo_trained and ref_trained prompt types only")
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        self.prompt_type = prompt_type
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_path, local_files_only=True).eval()
+        self.label_columns = self.get_label_columns(self.model.config.id2label)
+        self.session = None
+        if onnx_path:
+            self.load_onnx(onnx_path)
+
+    @staticmethod
+    def get_label_columns(id2label):
+        """Output column of each LABEL_DICT id, falling back to the LABEL_DICT order."""
+        try:
+            columns = {properties.LABEL_DICT[properties.Label(str(name).lower())]: int(column)
+                       for column, name in id2label.items()}
+        except ValueError:
+            columns = {}
+        if sorted(columns) != list(range(len(properties.LABEL_DICT))):
+            return list(range(len(properties.LABEL_DICT)))
+        return [columns[i] for i in range(len(properties.LABEL_DICT))]
+
+    def build_dataset(self, srcs_data, tgts_data):
+        """Tokenizes without padding; srcs_data/tgts_data come from EV2REvaluator.prepare_dataset."""
+        if self.prompt_type == properties.PromptTypes.PSEUDO_TRAINED:
+            texts = [tgt.claim for tgt in tgts_data]
+        else:
+            texts = [tgt.claim + "\n" + tgt.evidence for tgt in tgts_data]
+        pairs = [src.evidence for src in srcs_data]
+        encodings = self.tokenizer(texts, pairs, truncation=True, max_length=self.max_length)
+        labels = [properties.LABEL_DICT[properties.Label(tgt.label.lower())] for tgt in tgts_data]
+        return properties.PseudoTrainedScorerDataset(dict(encodings), labels,
+                                                     pad_token_id=self.tokenizer.pad_token_id or 0)
+
+    def predict_proba(self, srcs_data, tgts_data):
+        """Verdict probabilities in LABEL_DICT order, one row per claim in input order."""
+        dataset = self.build_dataset(srcs_data, tgts_data)
+        buckets = dataset.length_buckets(self.batch_size)
+        loader = properties.DataLoader(dataset, batch_sampler=buckets, collate_fn=dataset.collate)
+
+        probabilities = np.zeros((len(dataset), len(self.label_columns)))
+        with torch.inference_mode():
+            for indices, batch in zip(buckets, loader):
+                batch.pop("labels")
+                logits = self.run_model(batch)
+                logits = logits[:, self.label_columns]
+                logits = logits - logits.max(axis=1, keepdims=True)
+                probabilities[indices] = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        return probabilities
+
+    def run_model(self, batch):
+        if self.session is not None:
+            inputs = {name: batch[name].numpy() for name in self.onnx_inputs}
+            return self.session.run(["logits"], inputs)[0]
+        return self.model(**batch).logits.float().numpy()
+
+    def score(self, srcs_data, tgts_data):
+        """Per-claim probability of the gold verdict."""
+        probabilities = self.predict_proba(srcs_data, tgts_data)
+        labels = [properties.LABEL_DICT[properties.Label(tgt.label.lower())] for tgt in tgts_data]
+        return probabilities[np.arange(len(labels)), labels]
+
+    def evaluate_trained_score(self, srcs, tgts, trained_scores):
+        """Same aggregation as evaluate_ev2r_score, with the classifier probability instead of the recall."""
+        trained_scores = np.asarray(trained_scores, dtype=float)
+        levels = np.array(self.reporting_levels, dtype=float)
+        scores = (trained_scores[:, None] > levels[None, :]) & labels.label_agreement(srcs, tgts)[:, None]
+        return np.mean(scores.astype(float), axis=0)
+
+    def export_onnx(self, path, quantize=False):
+        """Exports the classifier to ONNX (and an int8 dynamically quantized copy) and switches to it."""
+        names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                 if name in self.tokenizer.model_input_names]
+        sample = self.tokenizer(["claim"], ["evidence"], return_tensors="pt")
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+        dynamic_axes["logits"] = {0: "batch"}
+        options = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            # The TorchScript exporter produces graphs that quantize_dynamic can shape-infer
+            options["dynamo"] = False
+        torch.onnx.export(self.model, tuple(sample[name] for name in names), path, input_names=names,
+                          output_names=["logits"], dynamic_axes=dynamic_axes, opset_version=14, **options)
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantized_path = os.path.splitext(path)[0] + ".int8.onnx"
+            quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+            path = quantized_path
+        self.load_onnx(path)
+        return path
+
+    def load_onnx(self, path):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.onnx_inputs = [node.name for node in self.session.get_inputs()]
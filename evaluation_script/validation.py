@@ -0,0 +1,64 @@
+import evaluation_script.labels as labels
+
+
+def is_known_label(label):
+    """Whether scoring reads the label as a verdict, with the same normalization."""
+    return labels.label_code(label) != labels.UNKNOWN
+
+
+def check_prediction(src, verdicts):
+    errors = []
+    if not isinstance(src.get("claim"), str):
+        errors.append("missing or non-string 'claim'")
+    if "pred_label" not in src:
+        errors.append("missing 'pred_label'")
+    elif not is_known_label(src["pred_label"]):
+        errors.append("unknown pred_label {!r}, expected one of {}".format(src["pred_label"], verdicts))
+    if not isinstance(src.get("evidence"), list):
+        errors.append("missing 'evidence' list")
+    else:
+        for j, qa in enumerate(src["evidence"]):
+            if not isinstance(qa, dict):
+                errors.append("evidence[{}] is not an object".format(j))
+                continue
+            for key in ("question", "answer"):
+                if not isinstance(qa.get(key), str):
+                    errors.append("evidence[{}] has a missing or non-string '{}'".format(j, key))
+    return errors
+
+
+def validate_submission(predictions, references, verdicts):
+    """Checks a whole submission in one pass and returns it aligned to the order of references.
+
+    Raises a ValueError listing every problem found, before any scoring starts.
+    Gold entries without a claim_id are identified by their position in the gold file.
+    """
+    if not isinstance(predictions, list):
+        raise ValueError("The submission must be a json list of predictions, got {}".format(
+            type(predictions).__name__))
+
+    gold_index = {tgt.get("claim_id", i): i for i, tgt in enumerate(references)}
+    aligned = [None] * len(references)
+    errors = []
+    for position, src in enumerate(predictions):
+        if not isinstance(src, dict):
+            errors.append("prediction {}: not an object".format(position))
+            continue
+        claim_id = src.get("claim_id")
+        where = "prediction {} (claim_id {!r})".format(position, claim_id)
+        if isinstance(claim_id, (list, dict)) or claim_id not in gold_index:
+            errors.append("{}: claim_id is missing or not in the gold file".format(where))
+        elif aligned[gold_index[claim_id]] is not None:
+            errors.append("{}: duplicate claim_id".format(where))
+        else:
+            aligned[gold_index[claim_id]] = src
+        errors.extend("{}: {}".format(where, error) for error in check_prediction(src, verdicts))
+
+    missing = [tgt.get("claim_id", i) for i, tgt in enumerate(references) if aligned[i] is None]
+    if missing:
+        errors.append("no prediction for {} gold claims: {}".format(len(missing), missing))
+
+    if errors:
+        raise ValueError("The submission has {} error(s):\n{}".format(len(errors), "\n".join(errors)))
+
+    return aligned
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+from concurrent import futures
+
+
+# Fixed parts of the zip records written by write_zip (PKWARE APPNOTE 4.3.7, 4.3.12 and 4.3.16)
+LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+CENTRAL_HEADER = struct.Struct("<4sHHHHHHLLLHHHHHLL")
+END_OF_CENTRAL_DIRECTORY = struct.Struct("<4sHHHHLLH")
+ZIP_VERSION = 20
+# Made by Unix, so that external_attr carries the file mode
+CREATE_SYSTEM = 3
+UTF8_FLAG = 0x800
+
+
+def collect_files(root, ignore_dirs=(), ignore_files=()):
+    """
+    Returns (path, name in the zip file) of every file under root, sorted by name
+
+    Arguments:
+        root {str}: The directory to walk
+        ignore_dirs {list}: Directory names to skip, pruned from the walk wherever they occur
+        ignore_files {list}: File names to skip
+    """
+    ignore_dirs, ignore_files = set(ignore_dirs), set(ignore_files)
+    collected = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in ignore_dirs]
+        for file in files:
+            if file not in ignore_files:
+                path = os.path.join(current, file)
+                collected.append((path, os.path.relpath(path, root).replace(os.sep, "/")))
+    return sorted(collected, key=lambda item: item[1])
+
+
+class BundleCache:
+    """
+    The previous build of a zip file and the manifest of the content hashes of its entries,
+    kept in a cache directory so that unchanged entries can be copied without recompressing them
+    """
+
+    def __init__(self, cache_dir, zip_name):
+        self.zip_path = os.path.join(cache_dir, zip_name)
+        self.manifest_path = self.zip_path + ".manifest.json"
+        self.manifest = {}
+        self.entries = {}
+        if os.path.exists(self.zip_path) and os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path) as f:
+                    self.manifest = json.load(f)
+                with zipfile.ZipFile(self.zip_path) as zf:
+                    self.entries = {zinfo.filename: zinfo for zinfo in zf.infolist()}
+            except (ValueError, zipfile.BadZipFile) as e:
+                print("Ignoring the unreadable bundle cache {}: {}".format(self.zip_path, e))
+                self.manifest, self.entries = {}, {}
+
+    def read_compressed(self, name, digest):
+        """
+        Returns the ZipInfo and the compressed bytes of an entry whose content hash is unchanged, else None
+        """
+        zinfo = self.entries.get(name)
+        if zinfo is None or self.manifest.get(name) != digest:
+            return None
+        with open(self.zip_path, "rb") as f:
+            f.seek(zinfo.header_offset)
+            name_length, extra_length = LOCAL_HEADER.unpack(f.read(LOCAL_HEADER.size))[-2:]
+            f.seek(name_length + extra_length, os.SEEK_CUR)
+            return zinfo, f.read(zinfo.compress_size)
+
+    def store(self, zip_path, manifest):
+        os.makedirs(os.path.dirname(self.zip_path) or ".", exist_ok=True)
+        shutil.copyfile(zip_path, self.zip_path)
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def prepare_entry(path, name, cache, stored_extensions, compresslevel=6):
+    """
+    Reads, hashes and compresses one file, or reuses its compressed bytes from the cached bundle
+
+    Returns the ZipInfo, the compressed bytes, the content hash and whether the cache was used
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    st = os.stat(path)
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    zinfo = zipfile.ZipInfo(name, date_time)
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = len(data)
+
+    cached = cache.read_compressed(name, digest) if cache else None
+    if cached is not None:
+        previous, compressed = cached
+        zinfo.compress_type, zinfo.CRC = previous.compress_type, previous.CRC
+    else:
+        zinfo.CRC = zlib.crc32(data)
+        if os.path.splitext(name)[1].lower() in stored_extensions:
+            # Already compressed formats gain nothing from deflate
+            zinfo.compress_type, compressed = zipfile.ZIP_STORED, data
+        else:
+            compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -15)
+            zinfo.compress_type, compressed = zipfile.ZIP_DEFLATED, compressor.compress(data) + compressor.flush()
+    zinfo.compress_size = len(compressed)
+    return zinfo, compressed, digest, cached is not None
+
+
+def encode_name(zinfo):
+    try:
+        return zinfo.filename.encode("ascii"), 0
+    except UnicodeEncodeError:
+        return zinfo.filename.encode("utf-8"), UTF8_FLAG
+
+
+def dos_date_time(date_time):
+    year, month, day, hour, minute, second = date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def needs_zip64(prepared_entries):
+    offset = 0
+    for zinfo, compressed in prepared_entries:
+        offset += LOCAL_HEADER.size + len(zinfo.filename.encode("utf-8")) + len(compressed)
+        if zinfo.file_size > zipfile.ZIP64_LIMIT:
+            return True
+    return offset > zipfile.ZIP64_LIMIT or len(prepared_entries) >= zipfile.ZIP_FILECOUNT_LIMIT
+
+
+def write_zip_recompressed(zip_path, prepared_entries):
+    """
+    Writes the entries with the zipfile module, which handles zip64 but compresses them again
+    """
+    with zipfile.ZipFile(zip_path, "w", allowZip64=True) as zf:
+        for zinfo, compressed in prepared_entries:
+            if zinfo.compress_type == zipfile.ZIP_DEFLATED:
+                compressed = zlib.decompress(compressed, -15)
+            zf.writestr(zipfile.ZipInfo(zinfo.filename, zinfo.date_time), compressed,
+                        compress_type=zinfo.compress_type)
+            zf.getinfo(zinfo.filename).external_attr = zinfo.external_attr
+
+
+def write_zip(zip_path, prepared_entries):
+    """
+    Writes already compressed entries to a new zip file
+
+    The zip records are written here rather than through zipfile, which has no public way to add
+    compressed bytes as they are. Archives that need zip64 are left to write_zip_recompressed.
+
+    Arguments:
+        zip_path {str}: The path of the zip file
+        prepared_entries {list}: (ZipInfo, compressed bytes) pairs, with the sizes and CRC set
+    """
+    if needs_zip64(prepared_entries):
+        write_zip_recompressed(zip_path, prepared_entries)
+        return
+    central_directory = []
+    with open(zip_path, "wb") as f:
+        for zinfo, compressed in prepared_entries:
+            name, flags = encode_name(zinfo)
+            dos_date, dos_time = dos_date_time(zinfo.date_time)
+            zinfo.header_offset = f.tell()
+            f.write(LOCAL_HEADER.pack(b"PK\x03\x04", ZIP_VERSION, flags, zinfo.compress_type, dos_time, dos_date,
+                                      zinfo.CRC, len(compressed), zinfo.file_size, len(name), 0))
+            f.write(name)
+            f.write(compressed)
+            central_directory.append(CENTRAL_HEADER.pack(
+                b"PK\x01\x02", CREATE_SYSTEM << 8 | ZIP_VERSION, ZIP_VERSION, flags, zinfo.compress_type, dos_time,
+                dos_date, zinfo.CRC, len(compressed), zinfo.file_size, len(name), 0, 0, 0, 0, zinfo.external_attr,
+                zinfo.header_offset) + name)
+        start = f.tell()
+        f.write(b"".join(central_directory))
+        f.write(END_OF_CENTRAL_DIRECTORY.pack(b"PK\x05\x06", 0, 0, len(central_directory),
+                                              len(central_directory), f.tell() - start, start, 0))
+
+
+def build_zip_files(zip_specs, cache_dir, stored_extensions, workers=None):
+    """
+    Builds several zip files at once; files are hashed and compressed in a shared thread pool
+
+    Arguments:
+        zip_specs {list}: (zip path, files, nested) tuples in build order, where files and nested are
+            [(file path, name in the zip file)] lists; nested lists zip files built earlier in zip_specs
+        cache_dir {str}: The directory of the previous bundles and their manifests
+        stored_extensions {set}: Extensions of files stored without compression
+        workers {int}: Number of threads, defaults to the ThreadPoolExecutor default
+    """
+    stats = {}
+    with futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for zip_path, files, _ in zip_specs:
+            cache = BundleCache(cache_dir, os.path.basename(zip_path))
+            entries = [pool.submit(prepare_entry, path, name, cache, stored_extensions) for path, name in files]
+            pending.append((zip_path, cache, entries))
+
+        for (zip_path, files, nested), (_, cache, entries) in zip(zip_specs, pending):
+            # Nested zip files only exist once the zip files before this one are written
+            entries = [entry.result() for entry in entries] + [
+                prepare_entry(path, name, None, stored_extensions) for path, name in nested
+            ]
+            write_zip(zip_path, [(zinfo, compressed) for zinfo, compressed, _, _ in entries])
+            cache.store(zip_path, {zinfo.filename: digest for zinfo, _, digest, _ in entries})
+            stats[zip_path] = {"entries": len(entries), "reused": sum(reused for _, _, _, reused in entries)}
+    return stats
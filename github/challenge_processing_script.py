@@ -16,6 +16,7 @@ from utils import (
     load_host_configs,
     validate_token,
 )
+from upload import create_upload_session, upload_file
 
 sys.dont_write_bytecode = True
 
@@ -57,15 +58,16 @@ if __name__ == "__main__":
 
     headers = get_request_header(HOST_AUTH_TOKEN)
 
-    # Creating the challenge zip file and storing in a dict to send to EvalAI
+    # Creating the challenge zip file, streamed to EvalAI from disk
     create_challenge_zip_file(CHALLENGE_ZIP_FILE_PATH, IGNORE_DIRS, IGNORE_FILES)
-    zip_file = open(CHALLENGE_ZIP_FILE_PATH, "rb")
-    file = {"zip_configuration": zip_file}
+    session = create_upload_session()
 
     data = {"GITHUB_REPOSITORY": GITHUB_REPOSITORY}
 
     try:
-        response = requests.post(url, data=data, headers=headers, files=file)
+        response = upload_file(
+            session, url, CHALLENGE_ZIP_FILE_PATH, "zip_configuration", data, headers
+        )
 
         if (
             response.status_code != http.HTTPStatus.OK
@@ -105,8 +107,8 @@ if __name__ == "__main__":
             print(error_message)
             os.environ["CHALLENGE_ERRORS"] = error_message
 
-    zip_file.close()
-    os.remove(zip_file.name)
+    session.close()
+    os.remove(CHALLENGE_ZIP_FILE_PATH)
 
     is_valid, errors = check_for_errors()
     if not is_valid:
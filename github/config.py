@@ -9,8 +9,11 @@ CHALLENGE_CREATE_OR_UPDATE_URL = "/api/challenges/challenge/challenge_host_team/
 EVALAI_ERROR_CODES = [400, 401, 406]
 API_HOST_URL = "https://eval.ai"
 IGNORE_DIRS = [
+    ".bundle_cache",
     ".git",
     ".github",
+    "benchmarks",
+    "tests",
     "github",
     "code_upload_challenge_evaluation",
     "remote_challenge_evaluation",
@@ -23,6 +26,17 @@ IGNORE_FILES = [
     "submission.json",
 ]
 CHALLENGE_ZIP_FILE_PATH = "challenge_config.zip"
+# Previous bundles and the content hashes of their entries, used to skip recompressing unchanged files
+BUNDLE_CACHE_DIR = ".bundle_cache"
+# Already compressed formats, stored in the bundle as they are
+STORED_EXTENSIONS = {".zip", ".gz", ".bz2", ".xz", ".7z", ".jpg", ".jpeg", ".png", ".gif", ".webp"}
+# Streaming upload of the bundle to EvalAI
+UPLOAD_CHUNK_SIZE = 1 << 20
+UPLOAD_TIMEOUT = (10, 600)  # (connect, read) seconds
+UPLOAD_RETRIES = 3
+UPLOAD_RETRY_BACKOFF = 5  # seconds, doubled after every failed attempt
+UPLOAD_RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+UPLOAD_POOL_SIZE = 4
 GITHUB_REPOSITORY = os.getenv("GITHUB_REPOSITORY")
 GITHUB_EVENT_NAME = os.getenv("GITHUB_EVENT_NAME")
 VALIDATION_STEP = os.getenv("IS_VALIDATION")
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from bundle import build_zip_files, collect_files, prepare_entry, write_zip, write_zip_recompressed
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.source = os.path.join(self.root, "challenge")
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.files = {
+            "challenge_config.yaml": b"title: test\n" * 200,
+            "evaluation_script/main.py": b"def evaluate():\n    return {}\n" * 50,
+            "logo.jpg": os.urandom(4096),
+            "annotations/gold_é.json": b'[{"claim": "x"}]' * 100,
+            "empty.txt": b"",
+        }
+        for name, content in self.files.items():
+            path = os.path.join(self.source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def build(self):
+        zip_path = os.path.join(self.root, "challenge_config.zip")
+        stats = build_zip_files([(zip_path, collect_files(self.source), [])], self.cache_dir, {".jpg"})
+        return zip_path, stats[zip_path]
+
+    def check_archive(self, zip_path):
+        with zipfile.ZipFile(zip_path) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual({name: zf.read(name) for name in zf.namelist()}, self.files)
+            self.assertEqual(zf.getinfo("logo.jpg").compress_type, zipfile.ZIP_STORED)
+
+    def test_rebuild_reuses_entries(self):
+        zip_path, stats = self.build()
+        self.check_archive(zip_path)
+        self.assertEqual(stats["reused"], 0)
+
+        zip_path, stats = self.build()
+        self.check_archive(zip_path)
+        self.assertEqual(stats["reused"], len(self.files))
+
+    def test_rebuild_after_change(self):
+        self.build()
+        self.files["evaluation_script/main.py"] = b"def evaluate():\n    return {'score': 1}\n"
+        with open(os.path.join(self.source, "evaluation_script/main.py"), "wb") as f:
+            f.write(self.files["evaluation_script/main.py"])
+
+        zip_path, stats = self.build()
+        self.check_archive(zip_path)
+        self.assertEqual(stats["reused"], len(self.files) - 1)
+
+    def test_recompressed_writer_matches(self):
+        entries = [prepare_entry(path, name, None, {".jpg"})[:2] for path, name in collect_files(self.source)]
+        direct, recompressed = os.path.join(self.root, "direct.zip"), os.path.join(self.root, "recompressed.zip")
+        write_zip(direct, entries)
+        write_zip_recompressed(recompressed, entries)
+        for zip_path in (direct, recompressed):
+            self.check_archive(zip_path)
+        with zipfile.ZipFile(direct) as a, zipfile.ZipFile(recompressed) as b:
+            for x, y in zip(a.infolist(), b.infolist()):
+                self.assertEqual((x.filename, x.date_time, x.external_attr, x.CRC),
+                                 (y.filename, y.date_time, y.external_attr, y.CRC))
+
+
+if __name__ == "__main__":
+    unittest.main()
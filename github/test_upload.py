@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import upload
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the EvalAI upload endpoint; server.failures lists what to do on the first
+    attempts: "drop" closes the connection halfway through the body, a status code replies with it
+    """
+
+    # A body shorter than its Content-Length fails the test instead of blocking it
+    timeout = 10
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        failure = self.server.failures.pop(0) if self.server.failures else None
+        if failure == "drop":
+            self.rfile.read(length // 2)
+            self.server.attempts.append({"length": length, "body": None})
+            self.close_connection = True
+            self.connection.shutdown(2)
+            return
+        try:
+            body = self.rfile.read(length)
+        except OSError:
+            body = b""
+        self.server.attempts.append({"length": length, "body": body, "content_type": self.headers["Content-Type"]})
+        self.send_response(failure or 201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_multipart(content_type, body):
+    message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    return {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+
+
+class UploadTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.dir, "challenge_config.zip")
+        # Several chunks, so the body is streamed in more than one read
+        self.content = os.urandom(3 * upload.UPLOAD_CHUNK_SIZE + 12345)
+        with open(self.file_path, "wb") as f:
+            f.write(self.content)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), UploadHandler)
+        self.server.attempts, self.server.failures = [], []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = "http://127.0.0.1:{}/upload/".format(self.server.server_address[1])
+        self.backoff, upload.UPLOAD_RETRY_BACKOFF = upload.UPLOAD_RETRY_BACKOFF, 0
+
+    def tearDown(self):
+        upload.UPLOAD_RETRY_BACKOFF = self.backoff
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def upload(self, **kwargs):
+        return upload.upload_file(
+            upload.create_upload_session(), self.url, self.file_path, "zip_configuration",
+            {"GITHUB_REPOSITORY": "owner/repo"}, {"Authorization": "Bearer token"}, **kwargs
+        )
+
+    def check_attempt(self, attempt):
+        self.assertEqual(len(attempt["body"]), attempt["length"])
+        parts = parse_multipart(attempt["content_type"], attempt["body"])
+        self.assertEqual(parts["zip_configuration"].get_content(), self.content)
+        self.assertEqual(parts["zip_configuration"].get_filename(), "challenge_config.zip")
+        self.assertEqual(parts["GITHUB_REPOSITORY"].get_content().strip(), "owner/repo")
+
+    def test_streamed_body(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.server.attempts), 1)
+        attempt = self.server.attempts[0]
+        body = upload.MultipartFileStream({"GITHUB_REPOSITORY": "owner/repo"}, "zip_configuration", self.file_path)
+        body.close()
+        self.assertEqual(attempt["length"], len(body))
+        self.check_attempt(attempt)
+
+    def test_retry_sends_the_whole_body_again(self):
+        self.server.failures = ["drop", 503]
+        response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.server.attempts), 3)
+        lengths = {attempt["length"] for attempt in self.server.attempts}
+        self.assertEqual(len(lengths), 1)
+        for attempt in self.server.attempts[1:]:
+            self.check_attempt(attempt)
+
+    def test_last_retry_response_is_returned(self):
+        self.server.failures = [503, 503]
+        response = self.upload(retries=1)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.attempts), 2)
+
+    def test_connection_error_after_last_retry(self):
+        self.server.failures = ["drop", "drop"]
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.upload(retries=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import *
+
+
+class MultipartFileStream:
+    """
+    A multipart/form-data body with form fields and one file, read from disk in chunks while it
+    is sent, so memory use does not grow with the file. Its length is known up front, so requests
+    sends a Content-Length header instead of a chunked transfer encoding.
+    """
+
+    def __init__(self, fields, file_field, file_path, chunk_size=UPLOAD_CHUNK_SIZE, progress=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={}".format(self.boundary)
+        head = ""
+        for name, value in fields.items():
+            head += '--{}\r\nContent-Disposition: form-data; name="{}"\r\n\r\n{}\r\n'.format(
+                self.boundary, name, value
+            )
+        head += (
+            '--{}\r\nContent-Disposition: form-data; name="{}"; filename="{}"\r\n'
+            "Content-Type: application/zip\r\n\r\n".format(
+                self.boundary, file_field, os.path.basename(file_path)
+            )
+        )
+        tail = "\r\n--{}--\r\n".format(self.boundary)
+        # None stands for the file contents
+        self.parts = [head.encode("utf-8"), None, tail.encode("utf-8")]
+        self.length = len(self.parts[0]) + os.path.getsize(file_path) + len(self.parts[2])
+        self.file = open(file_path, "rb")
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.sent = 0
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        chunks = []
+        remaining = size
+        while remaining and self.parts:
+            part = self.parts[0]
+            if part is None:
+                data = self.file.read(remaining)
+                if len(data) < remaining:
+                    self.parts.pop(0)
+            else:
+                data, self.parts[0] = part[:remaining], part[remaining:]
+                if not self.parts[0]:
+                    self.parts.pop(0)
+            chunks.append(data)
+            remaining -= len(data)
+        chunk = b"".join(chunks)
+        self.sent += len(chunk)
+        if self.progress and chunk:
+            self.progress(self.sent, self.length)
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self):
+        self.file.close()
+
+
+class UploadProgress:
+    """
+    Prints the share of the body sent, every `step` percent
+    """
+
+    def __init__(self, step=10):
+        self.step = step
+        self.next_report = step
+
+    def __call__(self, sent, total):
+        percent = 100 * sent // max(total, 1)
+        if percent >= self.next_report:
+            print("Uploaded {}% ({:.1f} of {:.1f} MB)".format(percent, sent / 1e6, total / 1e6))
+            self.next_report = (percent // self.step + 1) * self.step
+
+
+def create_upload_session(pool_size=UPLOAD_POOL_SIZE):
+    """
+    Returns a requests session that keeps its connections open between requests
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def upload_file(
+    session,
+    url,
+    file_path,
+    file_field,
+    data,
+    headers,
+    retries=UPLOAD_RETRIES,
+    timeout=UPLOAD_TIMEOUT,
+):
+    """
+    Posts a file as multipart/form-data, streamed from disk, and returns the response
+
+    Connection errors, timeouts and UPLOAD_RETRY_STATUS_CODES responses are retried with
+    exponential backoff; every attempt streams the file again from disk, so nothing is rebuilt.
+
+    Arguments:
+        session {requests.Session}: The session to send the request with
+        url {str}: The upload url
+        file_path {str}: The path of the file to upload
+        file_field {str}: The form field name of the file
+        data {dict}: Other form fields
+        headers {dict}: Request headers
+    """
+    for attempt in range(retries + 1):
+        body = MultipartFileStream(data, file_field, file_path, progress=UploadProgress())
+        request_headers = dict(headers)
+        request_headers["Content-Type"] = body.content_type
+        try:
+            response = session.post(url, data=body, headers=request_headers, timeout=timeout)
+            if response.status_code not in UPLOAD_RETRY_STATUS_CODES or attempt == retries:
+                return response
+            error = "HTTP {}".format(response.status_code)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == retries:
+                raise
+            error = e
+        finally:
+            body.close()
+        wait_time = UPLOAD_RETRY_BACKOFF * 2 ** attempt
+        print(
+            "Upload attempt {} of {} failed ({}), retrying in {} seconds".format(
+                attempt + 1, retries + 1, error, wait_time
+            )
+        )
+        time.sleep(wait_time)
@@ -1,8 +1,8 @@
 import json
 import os
 import sys
-import zipfile
 
+from bundle import build_zip_files, collect_files
 from config import *
 from github import Github
 
@@ -75,7 +75,10 @@ def create_github_repository_issue(
 def create_challenge_zip_file(challenge_zip_file_path, ignore_dirs, ignore_files):
     """
     Creates the challenge zip file at a given path
-    
+
+    Both zip files are built together; files whose content hash matches the previous build in
+    BUNDLE_CACHE_DIR reuse its compressed bytes, and files in STORED_EXTENSIONS are not recompressed.
+
     Arguments:
         challenge_zip_file_path {str}: The relative path of the created zip file
         ignore_dirs {list}: The list of directories to exclude from the zip file
@@ -85,37 +88,31 @@ def create_challenge_zip_file(challenge_zip_file_path, ignore_dirs, ignore_files
         os.getcwd()
     )  # Special case for github. For local. use os.path.dirname(os.getcwd())
 
-    # Creating evaluation_script.zip file
     eval_script_dir = working_dir + "/evaluation_script"
-    eval_script_zip = zipfile.ZipFile(
-        "evaluation_script.zip", "w", zipfile.ZIP_DEFLATED
+    eval_script_zip = "evaluation_script.zip"
+    challenge_files = [
+        (path, name)
+        for path, name in collect_files(working_dir, ignore_dirs, ignore_files)
+        if name != eval_script_zip
+    ]
+    stats = build_zip_files(
+        [
+            (eval_script_zip, collect_files(eval_script_dir), []),
+            (
+                challenge_zip_file_path,
+                challenge_files,
+                [(os.path.join(working_dir, eval_script_zip), eval_script_zip)],
+            ),
+        ],
+        BUNDLE_CACHE_DIR,
+        STORED_EXTENSIONS,
     )
-    for root, dirs, files in os.walk(eval_script_dir):
-        for file in files:
-            file_name = os.path.join(root, file)
-            name_in_zip_file = (
-                file_name[len(eval_script_dir) + 1 :]
-                if file_name.startswith(eval_script_dir)
-                else file_name
+    for zip_path, zip_stats in stats.items():
+        print(
+            "{}: {} entries, {} reused from the previous build".format(
+                zip_path, zip_stats["entries"], zip_stats["reused"]
             )
-            eval_script_zip.write(file_name, name_in_zip_file)
-    eval_script_zip.close()
-
-    # Creating the challenge_config.zip file
-    zipf = zipfile.ZipFile(challenge_zip_file_path, "w", zipfile.ZIP_DEFLATED)
-    for root, dirs, files in os.walk(working_dir):
-        parents = root.split("/")
-        if not set(parents) & set(ignore_dirs):
-            for file in files:
-                if file not in ignore_files:
-                    file_name = os.path.join(root, file)
-                    name_in_zip_file = (
-                        file_name[len(working_dir) + 1 :]
-                        if file_name.startswith(working_dir)
-                        else file_name
-                    )
-                    zipf.write(file_name, name_in_zip_file)
-    zipf.close()
+        )
 
 
 def get_request_header(token):
@@ -38,13 +38,14 @@ class EvalAI_Interface:
         headers = {"Authorization": "Bearer {}".format(self.AUTH_TOKEN)}
         return headers
 
-    def make_request(self, url, method, data=None):
+    def make_request(self, url, method, data=None, timeout=None):
         """Function to make request to EvalAI interface
 
         Args:
             url ([str]): URL of the request
             method ([str]): Method of the request
             data ([dict], optional): Data of the request. Defaults to None.
+            timeout ([float], optional): Seconds to wait for the server. Defaults to None.
 
         Returns:
             [JSON]: JSON response data
@@ -52,7 +53,7 @@ class EvalAI_Interface:
         headers = self.get_request_headers()
         try:
             response = requests.request(
-                method=method, url=url, headers=headers, data=data
+                method=method, url=url, headers=headers, data=data, timeout=timeout
             )
             response.raise_for_status()
         except requests.exceptions.RequestException:
@@ -103,36 +104,38 @@ class EvalAI_Interface:
         response = self.make_request(url, "POST", data)
         return response
 
-    def update_submission_data(self, data):
+    def update_submission_data(self, data, timeout=None):
         """Function to update the submission data on EvalAI
 
         Docs: https://eval.ai/api/docs/#operation/update_submission
 
         Args:
             data ([dict]): Data to be updated
+            timeout ([float], optional): Seconds to wait for the server. Defaults to None.
 
         Returns:
             [JSON]: JSON response data
         """
         url = URLS.get("update_submission").format(self.CHALLENGE_PK)
         url = self.return_url_per_environment(url)
-        response = self.make_request(url, "PUT", data=data)
+        response = self.make_request(url, "PUT", data=data, timeout=timeout)
         return response
 
-    def update_submission_status(self, data):
+    def update_submission_status(self, data, timeout=None):
         """
 
         Docs: https://eval.ai/api/docs/#operation/update_submission
 
         Args:
             data ([dict]): Data to be updated
+            timeout ([float], optional): Seconds to wait for the server. Defaults to None.
 
         Returns:
             [JSON]: JSON response data
         """
         url = URLS.get("update_submission").format(self.CHALLENGE_PK)
         url = self.return_url_per_environment(url)
-        response = self.make_request(url, "PATCH", data=data)
+        response = self.make_request(url, "PATCH", data=data, timeout=timeout)
         return response
 
     def get_submission_by_pk(self, submission_pk):
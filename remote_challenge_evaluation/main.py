@@ -6,6 +6,7 @@ import requests
 
 from eval_ai_interface import EvalAI_Interface
 from evaluate import evaluate
+from outbox import StatusOutbox
 
 # Remote Evaluation Meta Data
 # See https://evalai.readthedocs.io/en/latest/evaluation_scripts.html#writing-remote-evaluation-script
@@ -14,6 +15,8 @@ evalai_api_server = os.environ["API_SERVER"]
 queue_name = os.environ["QUEUE_NAME"]
 challenge_pk = os.environ["CHALLENGE_PK"]
 save_dir = os.environ.get("SAVE_DIR", "./")
+# Pending status and result updates, sent to EvalAI in the background (see outbox.py)
+outbox_dir = os.environ.get("OUTBOX_DIR", os.path.join(save_dir, "evalai_outbox"))
 
 
 def download(submission, save_dir):
@@ -71,8 +74,11 @@ def update_finished(
 
 if __name__ == "__main__":
     evalai = EvalAI_Interface(auth_token, evalai_api_server, queue_name, challenge_pk)
+    # update_running, update_finished and update_failed only queue the update
+    outbox = StatusOutbox(evalai, outbox_dir)
 
     while True:
+        evaluated = False
         # Get the message from the queue
         message = evalai.get_message_from_sqs_queue()
         message_body = message.get("body")
@@ -83,7 +89,10 @@ if __name__ == "__main__":
             # Get submission details -- This will contain the input file URL
             submission = evalai.get_submission_by_pk(submission_pk)
             challenge_phase = evalai.get_challenge_phase_by_pk(phase_pk)
-            if (
+            if outbox.has_pending(submission_pk):
+                # Evaluated by this worker; EvalAI shows the final status once the outbox sent it
+                pass
+            elif (
                 submission.get("status") == "finished"
                 or submission.get("status") == "failed"
                 or submission.get("status") == "cancelled"
@@ -93,16 +102,18 @@ if __name__ == "__main__":
 
             else:
                 if submission.get("status") == "submitted":
-                    update_running(evalai, submission_pk)
+                    update_running(outbox, submission_pk)
                 submission_file_path = download(submission, save_dir)
                 try:
                     results = evaluate(
                         submission_file_path, challenge_phase["codename"]
                     )
                     update_finished(
-                        evalai, phase_pk, submission_pk, json.dumps(results["result"])
+                        outbox, phase_pk, submission_pk, json.dumps(results["result"])
                     )
                 except Exception as e:
-                    update_failed(evalai, phase_pk, submission_pk, str(e))
-        # Poll challenge queue for new submissions
-        time.sleep(60)
+                    update_failed(outbox, phase_pk, submission_pk, str(e))
+                evaluated = True
+        if not evaluated:
+            # Poll challenge queue for new submissions
+            time.sleep(60)
@@ -0,0 +1,180 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Seconds before the first retry of a failed update, doubled on every further failure
+RETRY_BACKOFF = 5
+MAX_RETRY_BACKOFF = 300
+REQUEST_TIMEOUT = 60
+# Client errors that are worth retrying; any other 4xx response means the update is rejected
+RETRY_STATUS_CODES = (408, 429)
+METHODS = ("update_submission_status", "update_submission_data")
+
+
+class StatusOutbox:
+    """Submission status and result updates, sent to EvalAI by a background thread
+
+    update_submission_status and update_submission_data have the signature of the
+    EvalAI_Interface methods but only write the update to the outbox directory and return, so
+    the worker does not wait for EvalAI. The sender thread posts the updates of a submission in
+    the order they were made, one at a time, and retries failed ones with exponential backoff;
+    updates of other submissions are not held up. Pending updates are files, so they are sent
+    after a restart of the worker as well. Updates that EvalAI rejects and files that are not a
+    readable update are moved to failed/.
+    """
+
+    def __init__(self, evalai, outbox_dir):
+        """
+        Arguments:
+            evalai {EvalAI_Interface}: The interface the updates are sent with
+            outbox_dir {str}: The directory of the pending updates
+        """
+        self.evalai = evalai
+        self.outbox_dir = outbox_dir
+        self.failed_dir = os.path.join(outbox_dir, "failed")
+        os.makedirs(self.failed_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.sequence = max([self.sequence_of(name) for name in self.pending()] + [0])
+        # submission -> (failed attempts, time of the next attempt)
+        self.retries = {}
+        self.thread = threading.Thread(target=self.run, name="evalai-outbox", daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def sequence_of(name):
+        return int(name.split("_", 1)[0])
+
+    def pending(self):
+        return sorted(
+            (name for name in os.listdir(self.outbox_dir) if name.endswith(".json")),
+            key=self.sequence_of,
+        )
+
+    def has_pending(self, submission_pk):
+        suffix = "_{}.json".format(submission_pk)
+        return any(name.endswith(suffix) for name in self.pending())
+
+    def put(self, method, data):
+        with self.lock:
+            self.sequence += 1
+            name = "{:012d}_{}.json".format(self.sequence, data["submission"])
+        path = os.path.join(self.outbox_dir, name)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"method": method, "data": data}, f)
+        os.replace(path + ".tmp", path)
+        self.wakeup.set()
+
+    def update_submission_status(self, data):
+        self.put("update_submission_status", data)
+
+    def update_submission_data(self, data):
+        self.put("update_submission_data", data)
+
+    def move_to_failed(self, name):
+        os.replace(os.path.join(self.outbox_dir, name), os.path.join(self.failed_dir, name))
+
+    def send(self, name):
+        """
+        Posts one update; returns False if it should be retried later
+        """
+        path = os.path.join(self.outbox_dir, name)
+        try:
+            with open(path) as f:
+                update = json.load(f)
+            method, data = update["method"], update["data"]
+            if method not in METHODS:
+                raise ValueError("unknown method {}".format(method))
+        except (ValueError, KeyError, TypeError) as e:
+            # A corrupt file would otherwise hold up the later updates of its submission forever
+            logger.error("Unreadable EvalAI update {}, moved to {}: {}".format(name, self.failed_dir, e))
+            self.move_to_failed(name)
+            return True
+        try:
+            getattr(self.evalai, method)(data, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else None
+            if status_code is None or status_code >= 500 or status_code in RETRY_STATUS_CODES:
+                logger.warning("EvalAI update {} failed, will retry: {}".format(name, e))
+                return False
+            logger.error("EvalAI rejected the update {}, moved to {}: {}".format(name, self.failed_dir, e))
+            self.move_to_failed(name)
+            return True
+        except ValueError as e:
+            # A 2xx response whose body is not json: EvalAI took the update, posting it again
+            # would not change that
+            logger.warning("EvalAI update {} sent, but the response is not json: {}".format(name, e))
+        except requests.exceptions.RequestException as e:
+            logger.warning("EvalAI update {} failed, will retry: {}".format(name, e))
+            return False
+        os.remove(path)
+        return True
+
+    def send_pending(self):
+        """
+        Sends the oldest pending update of every submission that is not waiting for a retry
+
+        Returns the number of updates still pending
+        """
+        names = self.pending()
+        oldest = {}
+        for name in names:
+            oldest.setdefault(name.split("_", 1)[1], name)
+        for submission, name in oldest.items():
+            attempts, next_attempt = self.retries.get(submission, (0, 0))
+            if time.time() < next_attempt:
+                continue
+            try:
+                sent = self.send(name)
+            except Exception:
+                logger.exception("EvalAI update {} failed, will retry".format(name))
+                sent = False
+            if sent:
+                self.retries.pop(submission, None)
+            else:
+                backoff = min(RETRY_BACKOFF * 2 ** attempts, MAX_RETRY_BACKOFF)
+                self.retries[submission] = (attempts + 1, time.time() + backoff)
+        return len(self.pending())
+
+    def run(self):
+        while not self.stopped:
+            try:
+                remaining = self.send_pending()
+            except Exception:
+                logger.exception("EvalAI outbox error")
+                remaining = 1
+            if remaining:
+                # Next retry, or right away if an update of another submission can be sent
+                waits = [next_attempt - time.time() for _, next_attempt in self.retries.values()]
+                self.wakeup.wait(max(min(waits + [1.0]), 0.05))
+            else:
+                self.wakeup.wait()
+            self.wakeup.clear()
+
+    def flush(self, timeout=None):
+        """
+        Waits until every update is sent or rejected; returns False on timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending():
+            if deadline is not None and time.time() > deadline:
+                return False
+            self.wakeup.set()
+            time.sleep(0.1)
+        return True
+
+    def close(self, timeout=None):
+        """
+        Stops the sender thread after a flush; pending updates are kept for the next start
+        """
+        self.flush(timeout)
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join()
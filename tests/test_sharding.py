@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import evaluation_script.sharding as sharding
+
+
+class FileQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.queue_dir = tempfile.mkdtemp()
+        self.queue = sharding.FileQueue(self.queue_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.queue_dir)
+
+    def age(self, directory, name, seconds):
+        path = os.path.join(self.queue.dirs[directory], name + ".json")
+        old = time.time() - seconds
+        os.utime(path, (old, old))
+
+    def test_claim_of_an_old_task_is_not_requeued(self):
+        self.queue.put("shard_00000", {"claim_range": [0, 10]})
+        self.age("tasks", "shard_00000", sharding.LEASE_TIMEOUT + 100)
+
+        name, task = self.queue.claim()
+        self.queue.requeue_expired()
+
+        self.assertEqual((name, task), ("shard_00000", {"claim_range": [0, 10]}))
+        self.assertEqual(os.listdir(self.queue.dirs["tasks"]), [])
+        self.assertEqual(os.listdir(self.queue.dirs["running"]), ["shard_00000.json"])
+
+    def test_abandoned_claim_is_requeued(self):
+        self.queue.put("shard_00000", {"claim_range": [0, 10]})
+        self.queue.claim()
+        self.age("running", "shard_00000", sharding.LEASE_TIMEOUT + 100)
+
+        self.queue.requeue_expired()
+
+        self.assertEqual(os.listdir(self.queue.dirs["running"]), [])
+        self.assertEqual(self.queue.claim()[0], "shard_00000")
+
+    def test_finish_after_requeue(self):
+        self.queue.put("shard_00000", {"claim_range": [0, 10]})
+        self.queue.claim()
+        self.age("running", "shard_00000", sharding.LEASE_TIMEOUT + 100)
+        self.queue.requeue_expired()
+        self.queue.claim()
+
+        # The first worker finishes late, then the second one
+        self.queue.finish("shard_00000", {"values": [1]})
+        self.queue.finish("shard_00000", {"values": [1]})
+        self.assertEqual(self.queue.result("shard_00000"), {"values": [1]})
+
+
+if __name__ == "__main__":
+    unittest.main()